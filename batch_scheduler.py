@@ -0,0 +1,159 @@
+import collections
+import logging
+import math
+import multiprocessing
+import os
+
+from spacy.tokens import Doc
+
+from constants import ConfigHandler
+
+logger = logging.getLogger('logger')
+config = ConfigHandler()
+
+# Rough number of characters per (transformer) token in English texts
+CHARS_PER_TOKEN = 4
+MIN_BUCKET_TOKENS = 128
+MEMINFO_FILE = '/proc/meminfo'
+
+
+class BatchScheduler(object):
+    """
+    Runs nlp.pipe over texts of very different lengths.
+    The texts are grouped in buckets of similar length (powers of two, in tokens) within a small look-ahead
+    (ARTICLE_LOADER_PREFETCH texts), and each batch is made of texts of the same bucket, with a batch size given by
+    a token budget. Short articles are processed in large batches, long articles in small ones, and the batches are
+    not padded to the longest article of the corpus.
+    Each batch goes through the pipeline as a single batch of its own size (nlp.pipe only takes a fixed batch size).
+    With more than one process, the number of processes is chosen once (limited by the available cores and memory)
+    and a pool of forked workers, created once per run, processes whole batches.
+    The documents are returned in the original order of the texts, as soon as the previous ones are done.
+    """
+
+    def __init__(self, nlp, disabled=None, token_budget=None, max_processes=None, process_memory_mb=None,
+                 lookahead=None):
+        self.nlp = nlp
+        self.disabled = disabled if disabled else []
+        self.token_budget = token_budget or int(config.get('PIPE_TOKEN_BUDGET'))
+        self.lookahead = lookahead or int(config.get('ARTICLE_LOADER_PREFETCH'))
+        max_processes = max_processes or int(config.get('PIPE_MAX_PROCESSES'))
+        process_memory_mb = process_memory_mb or int(config.get('PIPE_PROCESS_MEMORY_MB'))
+        self.n_process = self.get_max_processes(max_processes, process_memory_mb)
+
+    @staticmethod
+    def get_max_processes(max_processes, process_memory_mb):
+        cores = os.cpu_count() or 1
+        available_memory_mb = BatchScheduler.get_available_memory_mb()
+        if available_memory_mb is None:
+            return max(1, min(max_processes, cores))
+        return max(1, min(max_processes, cores, int(available_memory_mb // process_memory_mb)))
+
+    @staticmethod
+    def get_available_memory_mb():
+        # MemAvailable also counts the memory the kernel can reclaim (eg. page cache), unlike the free pages
+        try:
+            with open(MEMINFO_FILE, 'r') as f:
+                for line in f:
+                    if line.startswith('MemAvailable:'):
+                        return int(line.split()[1]) / 1024
+        except (OSError, ValueError):
+            pass
+        return None
+
+    @staticmethod
+    def get_tokens(text):
+        return max(1, len(text) // CHARS_PER_TOKEN)
+
+    @staticmethod
+    def get_bucket(tokens):
+        # Upper bound (in tokens) of the bucket the text belongs to
+        return max(MIN_BUCKET_TOKENS, 2 ** math.ceil(math.log2(tokens)))
+
+    def get_batch_size(self, bucket):
+        return max(1, self.token_budget // bucket)
+
+    def pipe(self, texts):
+        batches = LookaheadBatches(self, texts)
+        if self.n_process == 1:
+            processed = ((batch, self.__process_batch(batch)) for batch in batches)
+        else:
+            processed = self.__process_batches_in_pool(batches)
+
+        results = {}
+        next_index = 0
+        for batch, docs in processed:
+            for (index, _, context, _), doc in zip(batch, docs):
+                results[index] = (doc, context)
+            while next_index in results:
+                yield results.pop(next_index)
+                next_index += 1
+
+    def __process_batch(self, batch):
+        texts = [text for _, text, _, _ in batch]
+        return list(self.nlp.pipe(texts, disable=self.disabled, batch_size=len(texts)))
+
+    def __process_batches_in_pool(self, batches):
+        # The workers are forked, so they share the loaded pipeline instead of receiving a pickled copy
+        context = multiprocessing.get_context('fork')
+        with context.Pool(self.n_process, initializer=init_worker, initargs=(self.nlp, self.disabled)) as pool:
+            pending = collections.deque()
+            for batch in batches:
+                pending.append((batch, pool.apply_async(process_batch, ([text for _, text, _, _ in batch],))))
+                # A couple of batches per process are queued ahead, so the texts are not all loaded at once
+                if len(pending) > 2 * self.n_process:
+                    yield self.__get_pool_result(*pending.popleft())
+            while pending:
+                yield self.__get_pool_result(*pending.popleft())
+
+    def __get_pool_result(self, batch, result):
+        return batch, [Doc(self.nlp.vocab).from_bytes(data) for data in result.get()]
+
+
+# Pipeline of a worker process of the pool, inherited from the parent process
+worker_nlp = None
+worker_disabled = None
+
+
+def init_worker(nlp, disabled):
+    global worker_nlp, worker_disabled
+    worker_nlp = nlp
+    worker_disabled = disabled
+
+
+def process_batch(texts):
+    docs = worker_nlp.pipe(texts, disable=worker_disabled, batch_size=len(texts))
+    return [doc.to_bytes() for doc in docs]
+
+
+class LookaheadBatches(object):
+    """
+    Batches of texts of the same bucket, formed within a look-ahead of the input texts.
+    The next batch is always the one of the oldest text read, so a text waits for at most one look-ahead.
+    """
+
+    def __init__(self, scheduler, texts):
+        self.scheduler = scheduler
+        self.texts = enumerate(texts)
+        self.buffer = []  # (index, text, context, bucket), in the order of the texts
+
+    def __iter__(self):
+        batch = self.next_batch()
+        while batch:
+            yield batch
+            batch = self.next_batch()
+
+    def next_batch(self):
+        while len(self.buffer) < self.scheduler.lookahead:
+            item = next(self.texts, None)
+            if item is None:
+                break
+            index, (text, context) = item
+            self.buffer.append((index, text, context, self.scheduler.get_bucket(self.scheduler.get_tokens(text))))
+        if not self.buffer:
+            return None
+        bucket = self.buffer[0][3]
+        batch = [item for item in self.buffer if item[3] == bucket][:self.scheduler.get_batch_size(bucket)]
+        batch_indexes = {item[0] for item in batch}
+        self.buffer = [item for item in self.buffer if item[0] not in batch_indexes]
+        logger.debug("Batch of %s texts of up to %s tokens", len(batch), bucket)
+        return batch
@@ -0,0 +1,69 @@
+import logging
+import re
+
+from constants import ConfigHandler, PRONOUNS
+from name_handler import shared_name_handler
+
+logger = logging.getLogger('logger')
+config = ConfigHandler()
+
+WORD_REGEX = re.compile(r"\w+")
+
+
+class GazetteerGate(object):
+    """
+    Screens paragraphs before they are sent to the transformer, without any model.
+    A paragraph is a candidate when it contains a pronoun handled by PersonRecognition or a capitalized word
+    found in the first names dataset (above MIN_FIRST_NAME_FREQUENCY_THRESHOLD).
+    Mentions made only by last names (eg. "Obama said") in paragraphs without pronouns are missed.
+    """
+
+    name = "gazetteer"
+
+    def __init__(self, names=None, threshold=None):
+        if threshold is None:
+            threshold = config.get_snapshot().min_first_name_frequency_threshold
+        self.threshold = threshold
+        if names is None:
+            self.first_names = shared_name_handler.names.get_first_names(threshold)
+        else:
+            self.first_names = {name for name, entry in names.items() if entry.is_first_name(threshold)}
+
+    def get_id(self):
+        """Name and parameters of the gate, eg. for the keys of the document cache"""
+        return "{0}:{1}".format(self.name, self.threshold)
+
+    def screen(self, texts):
+        return [self.is_candidate(text) for text in texts]
+
+    def is_candidate(self, text):
+        for word in WORD_REGEX.findall(text):
+            lower = word.lower()
+            if lower in PRONOUNS or (word[0].isupper() and lower in self.first_names):
+                return True
+        return False
+
+
+class ModelGate(object):
+    """
+    Screens paragraphs with a small (CPU) spaCy model, eg. en_core_web_sm.
+    A paragraph is a candidate when the model finds a PERSON entity or it contains a pronoun, which are the cases
+    where PersonRecognition.get_person_spans finds a person.
+    """
+
+    def __init__(self, nlp, batch_size=64):
+        self.nlp = nlp
+        self.batch_size = batch_size
+        self.name = "model:{0}_{1}".format(nlp.meta.get('lang'), nlp.meta.get('name'))
+
+    def get_id(self):
+        return "{0}:{1}".format(self.name, self.nlp.meta.get('version'))
+
+    def screen(self, texts):
+        return [self.__is_candidate(doc) for doc in self.nlp.pipe(texts, batch_size=self.batch_size)]
+
+    @staticmethod
+    def __is_candidate(doc):
+        if any(entity.label_ == 'PERSON' for entity in doc.ents):
+            return True
+        return any(token.lower_ in PRONOUNS for token in doc)
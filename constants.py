@@ -1,11 +1,15 @@
+import ast
 import configparser
+import dataclasses
 
 BASE_DIRECTORY = "<POINT_THIS_VARIABLE_TO_THE_DATA_DIRECTORY>"
 
 FIRST_NAMES_DATASET = BASE_DIRECTORY + "social_security_dataset_transformed.csv"
+FIRST_NAMES_INDEX = BASE_DIRECTORY + "social_security_dataset_transformed.npy"
 PARAMETER_FILE_NAME = BASE_DIRECTORY + "parameters.ini"
 
 WIKIPEDIA_DATA_LOCATION = BASE_DIRECTORY + "wikipedia_articles_html/"
+DOC_CACHE_LOCATION = BASE_DIRECTORY + "doc_cache/"
 
 MONTH_MAP = {"JAN": 1, "FEB": 2, "MAR": 3, "APR": 4, "MAY": 5, "JUN": 6, "JUL": 7, "AUG": 8, "SEP": 9, "OCT": 10, "NOV": 11, "DEC": 12}
 GENDER_MALE = 'M'
@@ -44,20 +48,82 @@ TOKEN_VERSUS = 'v.'
 TOKEN_NEE = "née"
 
 
+@dataclasses.dataclass(frozen=True)
+class ConfigSnapshot(object):
+    """
+    Typed and immutable copy of the resolution parameters, parsed and validated once.
+    It is passed to the classes in the hot paths of the resolution, which read its attributes instead of
+    parsing the configuration strings in every call. Use dataclasses.replace to change values for a single run.
+    """
+    min_first_name_frequency_threshold: float
+    group_similarity_threshold: float
+    group_attribute_match_score: float
+    group_attribute_mismatch_penalty: float
+    name_comparison_algorithm: str
+    name_comparison_threshold_overall: float
+    name_comparison_threshold_core: float
+    record_linkage_normalize_names: bool
+    person_recognition_backward_tokens: int
+    person_recognition_forward_tokens: int
+    generational_titles: tuple
+    royal_titles: tuple
+    academic_titles: tuple
+    courtesy_titles: tuple
+    army_titles: tuple
+    other_titles: tuple
+    fuzzy_name_lookup: bool
+    fuzzy_name_max_distance: int
+    relation_matcher_rules: tuple
+
+    @staticmethod
+    def from_config(config):
+        values = {}
+        for field in dataclasses.fields(ConfigSnapshot):
+            raw_value = config.get(field.name.upper())
+            try:
+                values[field.name] = ConfigSnapshot.__parse(field.type, raw_value)
+            except (ValueError, SyntaxError):
+                raise ValueError("Invalid value for parameter {0}: {1}".format(field.name, raw_value))
+        return ConfigSnapshot(**values)
+
+    @staticmethod
+    def __parse(value_type, raw_value):
+        if value_type is bool:
+            if raw_value.strip().lower() not in ['true', 'false']:
+                raise ValueError(raw_value)
+            return raw_value.strip().lower() == 'true'
+        if value_type is tuple:
+            values = ast.literal_eval(raw_value)
+            if not isinstance(values, list):
+                raise ValueError(raw_value)
+            return tuple(values)
+        return value_type(raw_value)
+
+
 class ConfigHandler(object):
+    # The parsed configuration and its cache are shared by all instances,
+    # so values changed through one handler (e.g. in a parameter sweep) are seen by every module
+    config = None
+    config_file = None
+    cache = {}
+    snapshot = None
 
     def __init__(self):
-        self.__read_config_file()
-        self.cache = {}
+        pass  # The file is only read when the first value is requested
+
+    def __read_config_if_required(self):
+        if ConfigHandler.config is None:
+            self.__read_config_file()
 
     def __read_config_file(self):
-        self.config_file = PARAMETER_FILE_NAME
-        self.config = configparser.ConfigParser()
-        self.config.read(self.config_file)
+        ConfigHandler.config_file = PARAMETER_FILE_NAME
+        ConfigHandler.config = configparser.ConfigParser()
+        ConfigHandler.config.read(ConfigHandler.config_file)
 
     def get(self, key):
         if key in self.cache:
             return self.cache[key]
+        self.__read_config_if_required()
         value = self.config['DEFAULT'][key]
         self.cache[key] = value
         return value
@@ -79,5 +145,12 @@ class ConfigHandler(object):
         self.__save_config()
         self.clear_cache()
 
+    def get_snapshot(self):
+        """Returns the typed parameters, parsed again only after the configuration changes"""
+        if ConfigHandler.snapshot is None:
+            ConfigHandler.snapshot = ConfigSnapshot.from_config(self)
+        return ConfigHandler.snapshot
+
     def clear_cache(self):
         self.cache.clear()
+        ConfigHandler.snapshot = None
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import logging
+import os
+
+import spacy
+from spacy.tokens import DocBin
+
+from constants import ConfigHandler, DOC_CACHE_LOCATION
+
+logger = logging.getLogger('logger')
+config = ConfigHandler()
+
+INDEX_FILE_NAME = "index.json"
+DOC_FILE_EXTENSION = ".spacy"
+
+
+class DocCache(object):
+    """
+    On-disk store of processed spaCy documents.
+    Each document is saved in its own DocBin file, named after a hash of the article text, the model name/version
+    and the components that process it. An index maps the article id to its current key, allowing random access by id.
+    If the text or the pipeline changes, the key changes as well and the document is processed again.
+    """
+
+    def __init__(self, nlp, disabled=None, location=DOC_CACHE_LOCATION, chunked=False, gate=None,
+                 chunk_max_chars=None):
+        self.nlp = nlp
+        self.disabled = sorted(disabled) if disabled else []
+        # Documents processed in paragraph chunks (up to chunk_max_chars) or through a gate (see
+        # CrossDocumentResolution) are stored under different keys
+        self.chunked = chunked or gate is not None
+        self.chunk_max_chars = chunk_max_chars  # CHUNK_MAX_CHARS of the current configuration when not given
+        self.gate_id = gate.get_id() if gate else None
+        self.location = location
+        self.index_file = os.path.join(location, INDEX_FILE_NAME)
+        os.makedirs(location, exist_ok=True)
+        self.index = self.__read_index()
+
+    def get_pipeline_id(self):
+        meta = self.nlp.meta
+        model_name = "{0}_{1}".format(meta.get('lang'), meta.get('name'))
+        # The components that actually process the documents (nlp.pipe_names leaves out the disabled ones)
+        components = [name for name in self.nlp.pipe_names if name not in self.disabled]
+        pipeline_id = "{0}|{1}|{2}|{3}".format(model_name, meta.get('version'), spacy.__version__,
+                                               ",".join(components))
+        if self.chunked:
+            chunk_max_chars = self.chunk_max_chars or int(config.get('CHUNK_MAX_CHARS'))
+            pipeline_id = "{0}|chunked:{1}".format(pipeline_id, chunk_max_chars)
+        if self.gate_id:
+            pipeline_id = "{0}|{1}".format(pipeline_id, self.gate_id)
+        return pipeline_id
+
+    def check_settings(self, chunked, gate):
+        """Raises ValueError unless documents processed with these settings are the ones stored under its keys"""
+        gate_id = gate.get_id() if gate else None
+        if self.chunked != (chunked or gate is not None) or self.gate_id != gate_id:
+            raise ValueError("The document cache was created with chunked={0} and gate={1}, but the documents are "
+                             "processed with chunked={2} and gate={3}".format(self.chunked, self.gate_id, chunked,
+                                                                               gate_id))
+
+    def __read_index(self):
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r', encoding="utf8") as f:
+                return json.load(f)
+        return {}
+
+    def __get_path(self, key):
+        return os.path.join(self.location, key + DOC_FILE_EXTENSION)
+
+    def get_key(self, text):
+        content = "{0}|{1}".format(self.get_pipeline_id(), text)
+        return hashlib.sha256(content.encode("utf8")).hexdigest()
+
+    def contains(self, text_id, text):
+        key = self.get_key(text)
+        return self.index.get(text_id) == key and os.path.exists(self.__get_path(key))
+
+    def get(self, text_id, text):
+        """Returns the cached document only if it was processed from the same text and pipeline"""
+        if not self.contains(text_id, text):
+            return None
+        return self.load(text_id)
+
+    def load(self, text_id):
+        """Random access by article id, without validating the text against the stored key"""
+        key = self.index.get(text_id)
+        if not key or not os.path.exists(self.__get_path(key)):
+            return None
+        doc_bin = DocBin().from_disk(self.__get_path(key))
+        return next(doc_bin.get_docs(self.nlp.vocab))
+
+    def put(self, text_id, text, doc):
+        key = self.get_key(text)
+        # User data is not stored as it holds the transformer output, which is not used after processing
+        doc_bin = DocBin(store_user_data=False)
+        doc_bin.add(doc)
+        doc_bin.to_disk(self.__get_path(key))
+        previous_key = self.index.get(text_id)
+        self.index[text_id] = key
+        # Removes the outdated entry, unless another article has exactly the same content
+        if previous_key and previous_key != key and previous_key not in self.index.values() \
+                and os.path.exists(self.__get_path(previous_key)):
+            os.remove(self.__get_path(previous_key))
+        logger.debug("Document %s stored in cache with key %s", text_id, key)
+
+    def save(self):
+        temp_file = self.index_file + ".tmp"
+        with open(temp_file, 'w', encoding="utf8") as f:
+            json.dump(self.index, f)
+        os.replace(temp_file, self.index_file)
+
+    def __len__(self):
+        return len(self.index)
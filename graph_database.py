@@ -1,7 +1,10 @@
 import logging
 from neo4j import GraphDatabase
 
-driver = GraphDatabase.driver("neo4j://localhost:7687", auth=("neo4j", "admin"))
+from utils import LazyInstance
+
+# The connection is only opened when the first session is requested
+driver = LazyInstance(GraphDatabase.driver, "neo4j://localhost:7687", auth=("neo4j", "admin"))
 logger = logging.getLogger('logger')
 
 NAME_RELATED_FIELDS = ["given_name", "known_as", "label", "birth_name", "nickname"]
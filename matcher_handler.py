@@ -0,0 +1,129 @@
+import logging
+from spacy.matcher import Matcher
+logger = logging.getLogger('logger')
+
+
+class MatcherRule(object):
+
+    def __init__(self, name, pattern, trigger, normalizer=None, desc=None):
+        self.name = name
+        self.pattern = pattern  # spaCy Matcher pattern (list of token specs)
+        self.trigger = trigger  # index of the token spec whose token is the result, as the group of a RegexRule
+        self.normalizer = normalizer
+        self.desc = desc
+
+
+class MatcherHandler(object):
+    """
+    Executes token patterns (spaCy Matcher) against a span, as an alternative to the regexes of RegexHandler.
+    The match is chosen as a regex search would: the first start, then the first keyword (trigger token) that the rest
+    of the pattern can follow.
+    The result of a rule is the text of its trigger token, and normalizers receive the token itself ('match'),
+    so they do not need to search the span for it again, and the name of the rule ('rule').
+    The Matcher is built for the vocab of the first span executed (and rebuilt if another vocab is used).
+    """
+
+    def __init__(self):
+        self.rules = {}
+        self.matcher = None
+        self.vocab = None
+
+    def get_keys(self):
+        return self.rules.keys()
+
+    def add_rule(self, identifier, name, pattern, trigger, normalizer=None, desc=None):
+        rule = MatcherRule(name, pattern, trigger, normalizer=normalizer, desc=desc)
+        if identifier in self.rules:
+            self.rules[identifier].append(rule)
+        else:
+            self.rules[identifier] = [rule]
+        self.matcher = None
+
+    def __get_matcher(self, vocab):
+        if self.matcher is None or self.vocab is not vocab:
+            self.matcher = Matcher(vocab)
+            for rules_group in self.rules.values():
+                for rule in rules_group:
+                    if rule.name not in self.matcher:
+                        self.matcher.add(rule.name, [rule.pattern])
+            self.vocab = vocab
+        return self.matcher
+
+    def __get_matches(self, span):
+        # First match (and its trigger token) of each pattern, with a single pass of the Matcher
+        matcher = self.__get_matcher(span.vocab)
+        starts = {}
+        for match_id, start, _ in matcher(span):
+            name = span.vocab.strings[match_id]
+            starts[name] = min(start, starts.get(name, start))
+        rules = {rule.name: rule for rules_group in self.rules.values() for rule in rules_group}
+        matches = {}
+        for name, start in starts.items():
+            trigger = self.__get_trigger(rules[name], span, start)
+            if trigger is not None:
+                matches[name] = span[trigger]
+        return matches
+
+    def __get_trigger(self, rule, span, start):
+        # The Matcher aligns a single trigger token per match, which is not always the first keyword (eg. with two
+        # relatives in the span). As the lazy regex, the trigger is the first keyword after the start such that the
+        # token specs before it match from the start, and the ones after it match later in the span.
+        before = [spec for spec in rule.pattern[:rule.trigger] if 'OP' not in spec]
+        after = [spec for spec in rule.pattern[rule.trigger + 1:] if 'OP' not in spec]
+        for idx in range(start, len(span)):
+            if not self.__token_matches(span[idx], rule.pattern[rule.trigger]):
+                continue
+            if self.__is_subsequence(span, start, idx, before, anchored=True) and \
+                    self.__is_subsequence(span, idx + 1, len(span), after):
+                return idx
+        return None
+
+    def __is_subsequence(self, span, start, end, specs, anchored=False):
+        # The fixed token specs of the patterns are separated by {"OP": "*"}, so they only need to appear in order
+        idx = start
+        for position, spec in enumerate(specs):
+            while idx < end and not self.__token_matches(span[idx], spec):
+                if anchored and position == 0:
+                    return False
+                idx += 1
+            if idx >= end:
+                return False
+            idx += 1
+        return True
+
+    @staticmethod
+    def __token_matches(token, spec):
+        # Token specs used by the patterns: the lower form (a word or a list of words) and custom extensions
+        for attr, value in spec.items():
+            if attr == 'LOWER':
+                words = value['IN'] if isinstance(value, dict) else [value]
+                if token.lower_ not in words:
+                    return False
+            elif attr == '_':
+                if any(getattr(token._, name) != expected for name, expected in value.items()):
+                    return False
+            else:
+                raise ValueError("Unsupported token spec attribute: {0}".format(attr))
+        return True
+
+    def __process_normalizer(self, rule, span, token):
+        if rule.normalizer:
+            return rule.normalizer.normalize(span=span, result=token.text, match=token, rule=rule.name)
+        return token.text
+
+    def execute(self, span):
+        results = {}
+        matches = self.__get_matches(span)
+        for key, rules_group in self.rules.items():
+            logger.debug("Executing token rule id: [%s]", key)
+            for rule in rules_group:
+                token = matches.get(rule.name)
+                if token is not None:
+                    logger.info("Token pattern %s matched [%s] - Span: %s", rule.name, token, span)
+                    result = self.__process_normalizer(rule, span, token)
+                    if result:
+                        if key in results:
+                            results[key].append(result)
+                        else:
+                            results[key] = [result]
+        return results
@@ -1,19 +1,39 @@
-import ast
+import collections
+import os
 import re
+import tempfile
+
+import jellyfish
+import numpy as np
 
 from person_entities import *
 from spacy_utils import SpacyUtils
-from utils import Utils
+from utils import Utils, LazyInstance, LRUCache
 
 logger = logging.getLogger('logger')
 config = ConfigHandler()
 utils = SpacyUtils()
 
-GEN_TITLES = ast.literal_eval(config.get('GENERATIONAL_TITLES'))
-ROYAL_TITLES = ast.literal_eval(config.get('ROYAL_TITLES'))
-ARMY_TITLES = ast.literal_eval(config.get('ARMY_TITLES'))
-COURTESY_TITLES = ast.literal_eval(config.get('COURTESY_TITLES'))
-OTHER_TITLES = ast.literal_eval(config.get('OTHER_TITLES'))
+# Shorter names are not looked up by approximation, as most of their neighbours are unrelated names
+FUZZY_MIN_NAME_LENGTH = 5
+
+# Title categories: (person attribute, configuration list, characters removed before the comparison,
+# only looked for in the first part, also looked for in the token before the name)
+TITLE_CATEGORIES = [
+    (PERSON_GEN_TITLE, 'generational_titles', ".,", False, False),
+    (PERSON_COURTESY_TITLE, 'courtesy_titles', ".", True, True),
+    (PERSON_ROYAL_TITLE, 'royal_titles', "", True, True),
+    (PERSON_ARMY_TITLE, 'army_titles', "", True, True),
+    (PERSON_OTHER_TITLE, 'other_titles', "", False, True),
+]
+
+# Result of looking up a (raw) name token in the first names dataset.
+# The matched name is the name found in the dataset, which differs from the normalized one in fuzzy matches.
+NameLookup = collections.namedtuple('NameLookup', ['normalized', 'matched_name', 'entry', 'is_first_name', 'gender'])
+
+# Result of parsing the text of a name: the attributes found in it (titles, nickname, first, middle and last names...),
+# the part of single names (classified with the names known in the document) and the lookup of its first part
+NameParse = collections.namedtuple('NameParse', ['attributes', 'single_name', 'name_lookup'])
 
 
 class FirstNameEntry(object):
@@ -26,14 +46,16 @@ class FirstNameEntry(object):
         self.female_proportion = female_proportion
         self.male_proportion = male_proportion
 
-    def is_first_name(self):
-        return self.overall_frequency > float(config.get('MIN_FIRST_NAME_FREQUENCY_THRESHOLD'))
+    def is_first_name(self, threshold=None):
+        if threshold is None:
+            threshold = config.get_snapshot().min_first_name_frequency_threshold
+        return self.overall_frequency > threshold
 
     def get_overall_frequency(self):
         return self.overall_frequency
 
-    def get_gender(self):
-        if self.is_first_name():
+    def get_gender(self, threshold=None):
+        if self.is_first_name(threshold):
             return GENDER_MALE if self.male_count > self.female_count else GENDER_FEMALE
         return None
 
@@ -41,9 +63,9 @@ class FirstNameEntry(object):
 class FirstNameDataset(object):
 
     @staticmethod
-    def get_names():
+    def get_names(path=FIRST_NAMES_DATASET):
         names = {}
-        with open(FIRST_NAMES_DATASET, 'r') as reader:
+        with open(path, 'r') as reader:
             next(reader)  # skip header
             for line in reader:
                 parts = line.strip().split(",")
@@ -58,6 +80,205 @@ class FirstNameDataset(object):
         return names
 
 
+class FirstNameIndex(object):
+    """
+    Binary version of the first names dataset: a structured numpy array with one row per name, sorted by name.
+    The file is memory mapped (read only), so it loads almost instantly and its pages are shared by all the processes.
+    Names are found by binary search. The index is built from the CSV when missing or older than the CSV.
+    """
+
+    COLUMNS = [('total_count', 'i8'), ('overall_frequency', 'f8'), ('female_count', 'i8'), ('male_count', 'i8'),
+               ('female_proportion', 'f8'), ('male_proportion', 'f8')]
+
+    def __init__(self, location=FIRST_NAMES_INDEX, dataset=FIRST_NAMES_DATASET):
+        if self.is_outdated(location, dataset):
+            self.build(dataset, location)
+        self.data = np.load(location, mmap_mode='r')
+        self.keys = self.data['name']
+
+    @staticmethod
+    def is_outdated(location, dataset):
+        # The index can be shipped without the CSV
+        if not os.path.exists(location):
+            return True
+        return os.path.exists(dataset) and os.path.getmtime(location) < os.path.getmtime(dataset)
+
+    @staticmethod
+    def build(dataset, location):
+        logger.info("Building first names index %s from %s", location, dataset)
+        names = FirstNameDataset.get_names(dataset)
+        keys = sorted(names)
+        key_length = max([len(key) for key in keys] + [1])
+        data = np.array([(key,) + tuple(getattr(names[key], column) for column, _ in FirstNameIndex.COLUMNS)
+                         for key in keys], dtype=[('name', 'U{0}'.format(key_length))] + FirstNameIndex.COLUMNS)
+        # Unique temporary file, so concurrent builds do not write to the same file
+        fd, temp_file = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(location)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, data)
+            os.replace(temp_file, location)
+        except BaseException:
+            os.remove(temp_file)
+            raise
+
+    def __find(self, name):
+        idx = int(np.searchsorted(self.keys, name))
+        if idx < len(self.keys) and self.keys[idx] == name:
+            return idx
+        return None
+
+    def __contains__(self, name):
+        return self.__find(name) is not None
+
+    def __getitem__(self, name):
+        idx = self.__find(name)
+        if idx is None:
+            raise KeyError(name)
+        return self.__get_entry(idx)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __get_entry(self, idx):
+        row = self.data[idx]
+        return FirstNameEntry(int(row['total_count']), float(row['overall_frequency']), int(row['female_count']),
+                              int(row['male_count']), float(row['female_proportion']), float(row['male_proportion']))
+
+    def get(self, name, default=None):
+        idx = self.__find(name)
+        return default if idx is None else self.__get_entry(idx)
+
+    def items(self):
+        for idx in range(len(self.keys)):
+            yield str(self.keys[idx]), self.__get_entry(idx)
+
+    def get_first_names(self, threshold=None):
+        """Names considered first names (see FirstNameEntry.is_first_name)"""
+        if threshold is None:
+            threshold = config.get_snapshot().min_first_name_frequency_threshold
+        return set(self.keys[self.data['overall_frequency'] > threshold].tolist())
+
+
+class FuzzyNameIndex(object):
+    """
+    Finds the closest name within a (Damerau-Levenshtein) edit distance, SymSpell style.
+    Each name is indexed under every string obtained by deleting up to max_distance characters from it.
+    A query only generates the deletes of the queried name and verifies the few candidates sharing one of them,
+    so the dictionary is never scanned. Ties are resolved by the most frequent name.
+    """
+
+    def __init__(self, frequencies, max_distance=1):
+        self.frequencies = frequencies  # name -> overall frequency
+        self.max_distance = max_distance
+        self.deletes = {}
+        for name in frequencies:
+            for variant in self.__get_deletes(name):
+                self.deletes.setdefault(variant, []).append(name)
+
+    def __get_deletes(self, word):
+        deletes = {word}
+        current = {word}
+        for _ in range(self.max_distance):
+            current = {variant[:i] + variant[i + 1:] for variant in current for i in range(len(variant))}
+            deletes.update(current)
+        return deletes
+
+    def find(self, word):
+        if word in self.frequencies:
+            return word
+        candidates = set()
+        for variant in self.__get_deletes(word):
+            candidates.update(self.deletes.get(variant, []))
+        best_name = None
+        best_key = None
+        for candidate in candidates:
+            distance = jellyfish.damerau_levenshtein_distance(word, candidate)
+            key = (distance, -self.frequencies[candidate], candidate)
+            if distance <= self.max_distance and (best_key is None or key < best_key):
+                best_name, best_key = candidate, key
+        return best_name
+
+
+class TitleLexicon(object):
+    """
+    The title lists of the configuration compiled into hash maps over normalized words.
+    The parts of a name are classified in a single pass, returning the first title of every category with the same
+    rules as the NameHandler.look_for_*_title searches. Titles with multiple words (eg. "lieutenant colonel") match
+    consecutive parts and take precedence over a title made of their first word.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.first_part_categories = {category for category, _, _, first_part, _ in TITLE_CATEGORIES if first_part}
+        self.previous_token_categories = {category for category, _, _, _, previous in TITLE_CATEGORIES if previous}
+        self.words = {}  # removed characters -> normalized word -> categories
+        self.phrases = {}  # removed characters -> first word -> [(words, category)], longest first
+        self.max_words = 1
+        for category, attribute, strip_chars, _, _ in TITLE_CATEGORIES:
+            words = self.words.setdefault(strip_chars, {})
+            phrases = self.phrases.setdefault(strip_chars, {})
+            for title in getattr(settings, attribute):
+                title_words = tuple(title.split())
+                if len(title_words) == 1:
+                    words.setdefault(title_words[0], set()).add(category)
+                elif title_words:
+                    phrases.setdefault(title_words[0], []).append((title_words, category))
+                    self.max_words = max(self.max_words, len(title_words))
+        for phrases in self.phrases.values():
+            for entries in phrases.values():
+                entries.sort(key=lambda entry: -len(entry[0]))
+        self.classified = {}  # part -> (normalized forms, categories of the single word titles)
+
+    @staticmethod
+    def normalize(text, strip_chars):
+        text = text.lower()
+        for char in strip_chars:
+            text = text.replace(char, "")
+        return text.strip()
+
+    def search(self, parts, span=None):
+        """Returns the title found for each category (person attribute), with its words separated by spaces"""
+        titles = {}
+        for idx in range(len(parts)):
+            for category, length in self.__match(parts, idx).items():
+                if category not in titles and (idx == 0 or category not in self.first_part_categories):
+                    titles[category] = " ".join(parts[idx:idx + length])
+        if span is not None and span.start > 0 and not self.previous_token_categories.issubset(titles):
+            self.__search_previous_tokens(titles, span)
+        return titles
+
+    def __search_previous_tokens(self, titles, span):
+        # Titles ending right before the span, the longest first
+        tokens = [str(token) for token in span.doc[max(0, span.start - self.max_words):span.start]]
+        for idx in range(len(tokens)):
+            for category, length in self.__match(tokens, idx).items():
+                if idx + length == len(tokens) and category not in titles and \
+                        category in self.previous_token_categories:
+                    titles[category] = " ".join(tokens[idx:])
+
+    def __match(self, texts, idx):
+        # Titles starting at texts[idx]: category -> number of words
+        forms, categories = self.__classify(texts[idx])
+        matches = {category: 1 for category in categories}
+        for strip_chars, phrases in self.phrases.items():
+            for words, category in phrases.get(forms[strip_chars], ()):
+                if matches.get(category, 1) == 1 and len(words) <= len(texts) - idx and \
+                        all(self.__classify(texts[idx + i])[0][strip_chars] == word for i, word in enumerate(words)):
+                    matches[category] = len(words)
+        return matches
+
+    def __classify(self, part):
+        result = self.classified.get(part)
+        if result is None:
+            forms = {strip_chars: self.normalize(part, strip_chars) for strip_chars in self.words}
+            categories = set()
+            for strip_chars, words in self.words.items():
+                categories.update(words.get(forms[strip_chars], ()))
+            result = (forms, categories)
+            self.classified[part] = result
+        return result
+
+
 class PronounHandler(object):
 
     def get_gender(self, pronoun):
@@ -69,32 +290,83 @@ class PronounHandler(object):
 
 class NameHandler(object):
 
-    def __init__(self):
-        self.names = FirstNameDataset.get_names()
+    def __init__(self, settings=None):
+        self.settings = settings  # ConfigSnapshot, the current configuration when not given
+        self.names = FirstNameIndex()
         self.non_existing_name = FirstNameEntry(0, 0, 0, 0, 0, 0)
+        # The same tokens repeat across the corpus, so their lookups are cached
+        self.lookup_cache = LRUCache(int(config.get('NAME_LOOKUP_CACHE_SIZE')))
+        self.fuzzy_index = None
+        self.fuzzy_index_key = None
+        self.title_lexicon = None
+        # Parses of the same names (and tokens before them) are reused across the corpus
+        self.parse_cache = LRUCache(int(config.get('NAME_PARSE_CACHE_SIZE')))
+        self.parse_cache_settings = None
 
     def get(self, name):
-        if name and name.lower().strip() in self.names:
-            return self.names[name.lower()]
-        return self.non_existing_name
+        if not name:
+            return self.non_existing_name
+        return self.names.get(name.lower().strip(), self.non_existing_name)
+
+    def get_settings(self):
+        return self.settings or config.get_snapshot()
+
+    def lookup(self, token):
+        settings = self.get_settings()
+        # The parameters are part of the key, so changing them (eg. in a parameter sweep) does not return stale verdicts
+        key = (token, settings.min_first_name_frequency_threshold, settings.fuzzy_name_lookup,
+               settings.fuzzy_name_max_distance)
+        return self.lookup_cache.get(key, lambda: self.__lookup(token, settings))
+
+    def __lookup(self, token, settings):
+        normalized = Utils.remove_accents(token).lower().strip()
+        entry = self.get(normalized)
+        matched_name = normalized if entry is not self.non_existing_name else None
+        # Names missing from the dataset (eg. archaic spellings) take the entry of the closest first name
+        if matched_name is None and settings.fuzzy_name_lookup and len(normalized) >= FUZZY_MIN_NAME_LENGTH:
+            matched_name = self.get_fuzzy_index().find(normalized)
+            if matched_name:
+                logger.debug("Name [%s] approximated to [%s]", normalized, matched_name)
+                entry = self.get(matched_name)
+        threshold = settings.min_first_name_frequency_threshold
+        return NameLookup(normalized, matched_name, entry, entry.is_first_name(threshold), entry.get_gender(threshold))
+
+    def get_fuzzy_index(self):
+        # Built on first use over the first names (above the frequency threshold), and again if the parameters change
+        settings = self.get_settings()
+        threshold = settings.min_first_name_frequency_threshold
+        max_distance = settings.fuzzy_name_max_distance
+        if self.fuzzy_index is None or self.fuzzy_index_key != (threshold, max_distance):
+            frequencies = {name: self.names.get(name).overall_frequency
+                           for name in self.names.get_first_names(threshold)}
+            self.fuzzy_index = FuzzyNameIndex(frequencies, max_distance=max_distance)
+            self.fuzzy_index_key = (threshold, max_distance)
+        return self.fuzzy_index
+
+    def get_title_lexicon(self):
+        # Compiled again when the configuration changes (the snapshot is then replaced)
+        settings = self.get_settings()
+        if self.title_lexicon is None or self.title_lexicon.settings is not settings:
+            self.title_lexicon = TitleLexicon(settings)
+        return self.title_lexicon
 
     def get_gender(self, name):
-        return self.get(name).get_gender()
+        return self.get(name).get_gender(self.get_settings().min_first_name_frequency_threshold)
 
     def look_for_generational_title(self, parts):
-        return self.__default_token_search(GEN_TITLES, parts, None, regex="[.,]")
+        return self.__default_token_search(self.get_settings().generational_titles, parts, None, regex="[.,]")
 
     def look_for_courtesy_title(self, parts, span):
-        return self.__default_token_search(COURTESY_TITLES, parts, span, regex="[.]", part_idx=0)
+        return self.__default_token_search(self.get_settings().courtesy_titles, parts, span, regex="[.]", part_idx=0)
 
     def look_for_royal_title(self, parts, span):
-        return self.__default_token_search(ROYAL_TITLES, parts, span, part_idx=0)
+        return self.__default_token_search(self.get_settings().royal_titles, parts, span, part_idx=0)
 
     def look_for_army_title(self, parts, span):
-        return self.__default_token_search(ARMY_TITLES, parts, span, part_idx=0)
+        return self.__default_token_search(self.get_settings().army_titles, parts, span, part_idx=0)
 
     def look_for_other_title(self, parts, span):
-        return self.__default_token_search(OTHER_TITLES, parts, span)
+        return self.__default_token_search(self.get_settings().other_titles, parts, span)
 
     def look_for_last_name_prior_wedding(self, parts):
         found = [value for value in parts if value[0] == '(' or value[0] == "["]
@@ -121,53 +393,104 @@ class NameHandler(object):
         return [entry for entry in parts if entry.lower() not in [TOKEN_NEE]]
 
     def process_parts(self, data, parts, span):
-        title = self.look_for_generational_title(parts)
+        # The titles of all categories are found in a single pass, which is only repeated when parts are removed
+        # (as some titles are only looked for in the first part)
+        lexicon = self.get_title_lexicon()
+        titles = lexicon.search(parts, span)
+
+        title = titles.get(PERSON_GEN_TITLE)
         if title:
+            if title.lower() in ['junior', 'senior']:
+                logger.debug("Should normalize this title to Jr or Sr.! %s %s", span, title)
             data[PERSON_GEN_TITLE] = title.replace(".", "").replace(",", "").strip()
-            parts.remove(title)
+            self.__clear_parts(title.split(), parts)
             if parts:
                 parts[-1] = parts[-1].replace(",", "")  # Remove comma from names such as Alpheus Spring Packard, Sr
+            titles = lexicon.search(parts, span)
 
-        courtesy = self.look_for_courtesy_title(parts, span)
+        courtesy = titles.get(PERSON_COURTESY_TITLE)
         if courtesy:
             data[PERSON_COURTESY_TITLE] = courtesy.replace(".", "").strip()
-            self.__clear_parts(courtesy, parts)
+            self.__clear_parts(courtesy.split(), parts)
+            titles = lexicon.search(parts, span)
 
         last_name_prior_wedding = self.look_for_last_name_prior_wedding(parts)
         if last_name_prior_wedding:
             data[PERSON_LAST_NAME_PRIOR_WEDDING] = Utils.replace_str(last_name_prior_wedding, "[][)(]", "")
             self.__clear_parts(last_name_prior_wedding, parts)
+            titles = lexicon.search(parts, span)
 
         nickname = self.look_for_nickname(parts)
         if nickname:
             data[PERSON_NICKNAME] = " ".join(nickname).replace('"', "").replace("'", "").strip()
             self.__clear_parts(nickname, parts)
+            titles = lexicon.search(parts, span)
 
-        royal_title = self.look_for_royal_title(parts, span)
+        royal_title = titles.get(PERSON_ROYAL_TITLE)
         if royal_title:
             data[PERSON_ROYAL_TITLE] = royal_title
-            self.__clear_parts(royal_title, parts)
+            self.__clear_parts(royal_title.split(), parts)
+            titles = lexicon.search(parts, span)
 
-        army_title = self.look_for_army_title(parts, span)
+        army_title = titles.get(PERSON_ARMY_TITLE)
         if army_title:
             data[PERSON_ARMY_TITLE] = army_title
             data[PERSON_ARMY_RELATED] = True
-            self.__clear_parts(army_title, parts)
+            self.__clear_parts(army_title.split(), parts)
+            titles = lexicon.search(parts, span)
 
-        other_title = self.look_for_other_title(parts, span)
+        other_title = titles.get(PERSON_OTHER_TITLE)
         if other_title:
             data[PERSON_OTHER_TITLE] = other_title
-            self.__clear_parts(other_title, parts)
+            self.__clear_parts(other_title.split(), parts)
 
         parts = self.exclude_unwanted_words(parts)
         return parts
 
     def to_person(self, attrs, known_names_map=None):
-
         span = list(attrs.keys())[0]
-        full_entry = str(span)
+        return self.__to_person(span, attrs[span], known_names_map)
+
+    def to_persons(self, span_attrs):
+        """
+        Returns the person data of all the mentions ({span: attrs}) of a document, in order.
+        Single names are classified with the names of the previous mentions, as known_names_map in to_person.
+        """
+        known_names_map = {'first_names': set(), 'last_names': set(), 'nicknames': set()}
+        persons = []
+        for span, attrs in span_attrs.items():
+            logger.debug("Before creating person with attributes: %s", attrs)
+            data = self.__to_person(span, attrs, known_names_map)
+            persons.append(data)
+            self.__add_known_names(data, known_names_map)
+        return persons
+
+    def get_name_parse(self, span):
+        """Returns the NameParse of the span, which only depends on its text and the tokens before it (for titles)"""
+        settings = self.get_settings()
+        if self.parse_cache_settings is not settings:
+            self.parse_cache.clear()
+            self.parse_cache_settings = settings
+        previous_tokens = span.doc[max(0, span.start - self.get_title_lexicon().max_words):span.start]
+        key = (span.text, tuple(token.text for token in previous_tokens))
+        return self.parse_cache.get(key, lambda: self.parse_name(str(span), span))
+
+    def parse_name(self, full_entry, span):
+        attributes = {}
+        clear_full_entry = Utils.replace_str(full_entry, '[([](n[eé]+|or) ', "(").strip()
+        parts = self.process_parts(attributes, clear_full_entry.split(), span)
+        if len(parts) == 0:
+            return NameParse(attributes, None, None)
+
+        first_part = parts[0]
+        if len(parts) == 2:
+            self.process_two_name_person(attributes, first_part, parts)
+        elif len(parts) > 2:
+            self.process_multiple_name_person(attributes, first_part, parts)
+        return NameParse(attributes, first_part if len(parts) == 1 else None, self.lookup(first_part))
 
-        data = attrs[span]
+    def __to_person(self, span, data, known_names_map):
+        full_entry = str(span)
         data['span'] = span
         text = span.text.lower()
         if len(span) == 1 and text in PRONOUNS:
@@ -176,24 +499,18 @@ class NameHandler(object):
             return data
 
         data[PERSON_FULL_NAME] = full_entry
-        clear_full_entry = Utils.replace_str(full_entry, '[([](n[eé]+|or) ', "(").strip()
-        parts = clear_full_entry.split()
-        parts = self.process_parts(data, parts, span)
+        name_parse = self.get_name_parse(span)
+        # The cached attributes are shared, so the lists (middle names) are copied
+        data.update({key: list(value) if isinstance(value, list) else value
+                     for key, value in name_parse.attributes.items()})
 
-        if len(parts) == 0:
+        if name_parse.name_lookup is None:
             return data
 
-        first_part = parts[0]
-        name_dictionary = self.get(Utils.remove_accents(first_part))
-
-        if len(parts) == 1:
-            self.process_single_name_person(data, first_part, known_names_map, name_dictionary)
-        elif len(parts) == 2:
-            self.process_two_name_person(data, first_part, parts)
-        else:
-            self.process_multiple_name_person(data, first_part, parts)
+        if name_parse.single_name is not None:
+            self.process_single_name_person(data, name_parse.single_name, known_names_map, name_parse.name_lookup)
 
-        data[PERSON_GENDER] = name_dictionary.get_gender()
+        data[PERSON_GENDER] = name_parse.name_lookup.gender
         self.review_gender(data)
         self.__normalize_data(data)
 
@@ -203,6 +520,19 @@ class NameHandler(object):
 
         return data
 
+    @staticmethod
+    def __add_known_names(data, known_names_map):
+        if data.get(PERSON_LAST_NAME):
+            known_names_map['last_names'].add(data[PERSON_LAST_NAME].lower())
+        if data.get(PERSON_FIRST_NAME):
+            known_names_map['first_names'].add(data[PERSON_FIRST_NAME].lower())
+        nickname = data.get(PERSON_NICKNAME)
+        if nickname:
+            if isinstance(nickname, list):
+                logger.warning("Person nickname is a list: %s", nickname)
+            else:
+                known_names_map['nicknames'].add(nickname.lower())
+
     @staticmethod
     def process_multiple_name_person(data, first_part, parts):
         data[PERSON_FIRST_NAME] = first_part
@@ -215,12 +545,12 @@ class NameHandler(object):
         data[PERSON_LAST_NAME] = parts[1]
 
     @staticmethod
-    def process_single_name_person(data, first_part, known_names_map, name_dictionary):
+    def process_single_name_person(data, first_part, known_names_map, name_lookup):
         if first_part.lower() in known_names_map['last_names']:
             data[PERSON_LAST_NAME] = first_part
         elif first_part.lower() in known_names_map['nicknames']:
             data[PERSON_NICKNAME] = first_part
-        elif first_part.lower() in known_names_map['first_names'] or name_dictionary.is_first_name():
+        elif first_part.lower() in known_names_map['first_names'] or name_lookup.is_first_name:
             data[PERSON_FIRST_NAME] = first_part
         else:
             data[PERSON_LAST_NAME] = first_part
@@ -282,7 +612,7 @@ class NameHandler(object):
         titles_found = [value for value in parts if self.__strip_text_regex(value, regex=regex) in def_list]
         if titles_found:
             if str(titles_found[0]).lower() in ['junior', 'senior']:
-                print("Should normalize this title to Jr or Sr.!", span, titles_found)
+                logger.debug("Should normalize this title to Jr or Sr.! %s %s", span, titles_found)
             return titles_found[0]
         if span:
             prev_token = utils.get_prev_token(span)
@@ -290,4 +620,5 @@ class NameHandler(object):
                 return str(prev_token)
 
 
-
+# Shared by the modules resolving names, the first names dataset is only loaded when first used
+shared_name_handler = LazyInstance(NameHandler)
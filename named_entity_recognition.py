@@ -1,20 +1,11 @@
 import logging
 import unidecode
 import re
-import ast
 from spacy_utils import SpacyUtils
 from constants import *
 
 config = ConfigHandler()
 
-# The following define how many tokens we look around a name
-# This helps to address cases where the full name is not recognised
-MAX_TOKENS_FORWARD = int(config.get('PERSON_RECOGNITION_FORWARD_TOKENS'))
-MAX_TOKENS_BACK = int(config.get('PERSON_RECOGNITION_BACKWARD_TOKENS'))
-
-ARMY_TITLES = ast.literal_eval(config.get('ARMY_TITLES'))
-ROYAL_TITLES = ast.literal_eval(config.get('ROYAL_TITLES'))
-
 # "née" is used to identify a woman by her maiden family name.
 # The text below has no accents for normalization purposes.
 FORMERLY_CALLED = 'nee'
@@ -35,9 +26,10 @@ class PersonRecognition(object):
     This class identifies Person Entities in a given (spacy) document and creates a named span and token extensions
     """
 
-    def __init__(self, document_id=None, exclusion_map=None):
+    def __init__(self, document_id=None, exclusion_map=None, settings=None):
         self.document_id = document_id
         self.exclusion_map = exclusion_map
+        self.settings = settings or config.get_snapshot()  # ConfigSnapshot
 
     def get_person_spans(self, document):
         person_name_spans = []
@@ -96,7 +88,8 @@ class PersonRecognition(object):
         return entity
 
     def __expand_applicable_names(self, document, entity):
-        ppn = self.__get_names(entity.sent, entity.end, "forward", MAX_TOKENS_FORWARD)
+        # Looking at the tokens after a name helps to address cases where the full name is not recognised
+        ppn = self.__get_names(entity.sent, entity.end, "forward", self.settings.person_recognition_forward_tokens)
         if ppn:
             lower = str(ppn[-1]).lower()
             if lower not in [TOKEN_AND, TOKEN_DOT, TOKEN_COMMA]:
@@ -0,0 +1,115 @@
+import logging
+
+from constants import ConfigHandler
+
+logger = logging.getLogger('logger')
+config = ConfigHandler()
+
+STAGE_TEXTS = 'texts'
+STAGE_DOCS = 'docs'
+STAGE_RESOLUTIONS = 'resolutions'
+STAGE_GROUPS = 'groups'
+
+# Stages of CrossDocumentResolution in execution order, with the configuration keys each of them reads.
+# A changed key invalidates the stage reading it and every stage after it.
+STAGE_PARAMETERS = [
+    (STAGE_TEXTS, set()),
+    (STAGE_DOCS, set()),
+    (STAGE_RESOLUTIONS, {'MIN_FIRST_NAME_FREQUENCY_THRESHOLD', 'SPACY_NAMED_SPAN_PERSON', 'GROUP_SIMILARITY_THRESHOLD',
+                         'GROUP_ATTRIBUTE_MATCH_SCORE', 'GROUP_ATTRIBUTE_MISMATCH_PENALTY', 'NAME_COMPARISON_ALGORITHM',
+                         'NAME_COMPARISON_THRESHOLD_CORE', 'RECORD_LINKAGE_NORMALIZE_NAMES',
+                         'PERSON_RECOGNITION_BACKWARD_TOKENS', 'PERSON_RECOGNITION_FORWARD_TOKENS',
+                         'GENERATIONAL_TITLES', 'ROYAL_TITLES', 'ACADEMIC_TITLES', 'COURTESY_TITLES', 'ARMY_TITLES',
+                         'OTHER_TITLES', 'BASELINE_MODEL', 'FUZZY_NAME_LOOKUP', 'FUZZY_NAME_MAX_DISTANCE',
+                         'RELATION_MATCHER_RULES'}),
+    (STAGE_GROUPS, {'NAME_COMPARISON_ALGORITHM', 'NAME_COMPARISON_THRESHOLD_OVERALL', 'RECORD_LINKAGE_NORMALIZE_NAMES'}),
+]
+
+# These are read once when the modules are imported, so changing them within the same process has no effect
+IMPORT_TIME_PARAMETERS = {'SPACY_NAMED_SPAN_PERSON'}
+
+
+class ParameterSweep(object):
+    """
+    Executes CrossDocumentResolution for multiple parameter combinations over the same documents.
+    The output of each stage is kept in memory and a stage is only executed again when one of the parameters
+    it reads has changed (or a previous stage was executed again).
+    Eg.: sweeping NAME_COMPARISON_THRESHOLD_OVERALL processes the documents with spaCy only once.
+
+    Note: the groups returned by a run are only valid until the next run, as the person references are shared.
+    """
+
+    def __init__(self, resolution, documents):
+        self.resolution = resolution  # CrossDocumentResolution
+        self.documents = documents
+        self.outputs = {}
+        self.applied_parameters = {}
+        self.person_state = []
+        self.executions = {stage: 0 for stage, _ in STAGE_PARAMETERS}
+
+    def sweep(self, parameter_list):
+        for parameters in parameter_list:
+            yield parameters, self.run(parameters)
+
+    def run(self, parameters):
+        changed = self.__get_changed_keys(parameters)
+        if changed:
+            config.set_values(parameters)
+            self.applied_parameters.update({key.upper(): str(value) for key, value in parameters.items()})
+        self.__invalidate(changed)
+
+        texts = self.__get_output(STAGE_TEXTS, lambda: self.resolution.load_texts(self.documents))
+        docs = self.__get_output(STAGE_DOCS, lambda: list(self.resolution.process_texts(texts)))
+        resolutions = self.__get_output(STAGE_RESOLUTIONS, lambda: self.__resolve_documents(docs))
+        # The final stage is cheap and mutates the person references, so it always runs (from a restored state)
+        self.__restore_person_state()
+        self.executions[STAGE_GROUPS] += 1
+        return self.resolution.link(resolutions)
+
+    def __get_changed_keys(self, parameters):
+        return {key.upper() for key, value in parameters.items()
+                if self.applied_parameters.get(key.upper()) != str(value)}
+
+    def __invalidate(self, changed_keys):
+        if not changed_keys:
+            return
+        frozen = changed_keys.intersection(IMPORT_TIME_PARAMETERS)
+        if frozen:
+            logger.warning("Parameters are read at import time and will not change within the sweep: %s", frozen)
+
+        known_keys = set().union(*[keys for _, keys in STAGE_PARAMETERS])
+        invalidated = False
+        for stage, keys in STAGE_PARAMETERS:
+            # Unknown keys invalidate everything from the first stage that reads the configuration
+            if keys and (changed_keys.intersection(keys) or changed_keys - known_keys):
+                invalidated = True
+            if invalidated and stage in self.outputs:
+                logger.debug("Parameters %s invalidated stage [%s]", changed_keys, stage)
+                self.outputs.pop(stage)
+
+    def __get_output(self, stage, execute):
+        if stage not in self.outputs:
+            logger.error("Executing stage [%s]", stage)
+            self.outputs[stage] = execute()
+            self.executions[stage] += 1
+        return self.outputs[stage]
+
+    def __resolve_documents(self, docs):
+        resolutions = self.resolution.resolve_documents(docs)
+        self.__save_person_state(resolutions)
+        return resolutions
+
+    # Linking the documents merges groups and remaps relationships in place.
+    # The state below is what the linkage changes, so it can be restored before the next run.
+    def __save_person_state(self, resolutions):
+        self.person_state = []
+        for resolution in resolutions.values():
+            for group in resolution:
+                for person in group:
+                    self.person_state.append((person, person.unique_group_id,
+                                              [dict(rel) for rel in person.mapped_rel]))
+
+    def __restore_person_state(self):
+        for person, unique_group_id, mapped_rel in self.person_state:
+            person.unique_group_id = unique_group_id
+            person.mapped_rel = [dict(rel) for rel in mapped_rel]
@@ -27,31 +27,30 @@ PROP_SIMILARITY_WEIGHTS = {
 class SimilarityCalculator(object):
 
     @staticmethod
-    def similarity(person1, person2):
+    def similarity(person1, person2, settings=None):
+        settings = settings or config.get_snapshot()
         score = 0
         for prop in PROP_SIMILARITY_WEIGHTS:
             p1 = getattr(person1, prop)
             p2 = getattr(person2, prop)
             if p1 and p2:
-                score += SimilarityCalculator.__similarity(p1, p2, prop)
+                score += SimilarityCalculator.__similarity(p1, p2, prop, settings)
 
         score = score / len(PROP_SIMILARITY_WEIGHTS)
         return score
 
     @staticmethod
-    def __similarity(p1, p2, prop):
+    def __similarity(p1, p2, prop, settings):
         score = 0
         logger.debug("Comparing property [%s]: [%s] and [%s]", prop, p1, p2)
         if p1 and isinstance(p1, list) and p2 and isinstance(p2, list):
             if any(i in p1 for i in p2):
                 score += 1 * PROP_SIMILARITY_WEIGHTS[prop]
         elif str(p1).strip().lower() == str(p2).strip().lower():
-            match_score_value = float(config.get('GROUP_ATTRIBUTE_MATCH_SCORE'))
             logger.debug("Properties are the same: [%s] and [%s]", p1, p2)
-            score += match_score_value * PROP_SIMILARITY_WEIGHTS[prop]
+            score += settings.group_attribute_match_score * PROP_SIMILARITY_WEIGHTS[prop]
         else:
-            penalty = float(config.get('GROUP_ATTRIBUTE_MISMATCH_PENALTY'))
-            score += penalty * PROP_SIMILARITY_WEIGHTS[prop]
+            score += settings.group_attribute_mismatch_penalty * PROP_SIMILARITY_WEIGHTS[prop]
         return score
 
 
@@ -69,6 +68,7 @@ class PersonReference(object):
             setattr(self, key, kwargs.get(key))
 
         if self.span:
+            self.text = self.span.text
             self.start = self.span.start
             self.end = self.span.end
             self.char_start = self.span.start_char
@@ -78,6 +78,10 @@ class PersonReference(object):
         # Used after rel is mapped into groups
         self.mapped_rel = []
 
+    def release_span(self):
+        """Drops the spaCy span (and with it, the reference to the whole document) once it is no longer needed"""
+        self.span = None
+
     def get_rels(self):
         return self.rel
 
@@ -127,10 +131,10 @@ class PersonReference(object):
         props = list(filter(None, props))
         return props
 
-    def get_similarity(self, person):
+    def get_similarity(self, person, settings=None):
         if self.is_same(person):
             return 1000.0
-        return SimilarityCalculator.similarity(self, person)
+        return SimilarityCalculator.similarity(self, person, settings)
 
     def get_identification(self):
         return "{0} [{1}:{2}]".format(self.full_name, self.start, self.end)
@@ -213,10 +217,10 @@ class PersonGroup(object):
     def length(self):
         return len(self.persons)
 
-    def get_similarity(self, person):
+    def get_similarity(self, person, settings=None):
         similarity = 0.0
         for entry in self.persons:
-            similarity += entry.get_similarity(person)
+            similarity += entry.get_similarity(person, settings)
         return similarity / self.length()
 
     def get_gender(self):
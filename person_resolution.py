@@ -10,12 +10,14 @@ utils = SpacyUtils()
 
 class PersonResolution(object):
 
-    def __init__(self, person_references):
+    def __init__(self, person_references, settings=None):
         self.person_references = person_references
+        self.settings = settings or config.get_snapshot()  # ConfigSnapshot
         self.unique_res_id = uuid.uuid4()
         self.groups = []
         self.person_tracking = set()
         self.group_tracking = {}  # using a dictionary so there is no need to iterate over the set
+        self.reference_offsets = None  # (char_start, char_end) -> first person reference, built when needed
 
     def next_id(self):
         return len(self.groups) + 1
@@ -148,13 +150,13 @@ class PersonResolution(object):
         max_similarity = 0
         current_group = None
         for group in plausible_groups:
-            sim = group.get_similarity(person)
+            sim = group.get_similarity(person, self.settings)
             if sim > max_similarity:
                 max_similarity = sim
                 current_group = group
             logger.debug("Calculated similarity for person %s with group %s: %s", person, group, sim)
         logger.debug("Max. similarity for person %s with group %s: %s", person, current_group, max_similarity)
-        if max_similarity > float(config.get('GROUP_SIMILARITY_THRESHOLD')):
+        if max_similarity > self.settings.group_similarity_threshold:
             return current_group
 
     def get_plausible_groups(self, person_target):
@@ -187,15 +189,29 @@ class PersonResolution(object):
             rel_list = relationship
         else:
             rel_list = [relationship]
+        if self.reference_offsets is None:
+            self.reference_offsets = {}
+            for person in self.person_references:
+                self.reference_offsets.setdefault((person.char_start, person.char_end), person)
         for rel in rel_list:
-            offset = rel.split(",")[2][1:-1].split(":")
-            start = int(offset[0])
-            end = int(offset[1])
-            rel_object = [e for e in self.person_references if e.char_start == start and e.char_end == end]
-            if rel_object:
-                rel_objects.append(rel_object[0])
+            rel_object = self.reference_offsets.get(rel.get_object_offset())
+            if rel_object is not None:
+                rel_objects.append(rel_object)
         return rel_objects
 
+    def get_offset_index(self):
+        """Maps the offsets of every person to its group (the first one, as in find_group_by_offset)"""
+        offset_index = {}
+        for group in self.groups:
+            for person in group:
+                offset_index.setdefault((person.char_start, person.char_end), group)
+        return offset_index
+
+    def compact(self):
+        """Releases the spaCy spans of all references. Only attributes and offsets are kept after this."""
+        for person in self.person_references:
+            person.release_span()
+
     def find_group_by_id(self, group_id):
         return self.group_tracking[group_id]
 
@@ -55,17 +55,19 @@ class CoreRecordLinkage(object):
     Core group persons are used as the initial basis for further grouping.
     We should have high confidence they are the same entity.
     """
+    def __init__(self, settings=None):
+        self.settings = settings or config.get_snapshot()  # ConfigSnapshot
+
     def resolve(self, references):
         Utils.normalize_array_properties(['yob', 'yod'], references)
 
-        normalize_names = config.get('RECORD_LINKAGE_NORMALIZE_NAMES')
-        if normalize_names and normalize_names.lower() == 'true':
+        if self.settings.record_linkage_normalize_names:
             Utils.normalize_text_properties(NAME_PROPERTIES, references)
 
         logger.debug("Looking for pairs for core resolution: %s", references)
 
-        comp_algorithm = config.get('NAME_COMPARISON_ALGORITHM')
-        comp_threshold = float(config.get('NAME_COMPARISON_THRESHOLD_CORE'))
+        comp_algorithm = self.settings.name_comparison_algorithm
+        comp_threshold = self.settings.name_comparison_threshold_core
 
         link = RecordLinkage(references, "id")
         link.add_comparator(String('first_name', 'first_name', method=comp_algorithm, threshold=comp_threshold, label='first_name'))
@@ -82,6 +84,9 @@ class CrossDocumentLinkage(object):
     Eg.: Doc1 -> [Michelle Obama, Michelle, She, Her, etc, Born on XYZ] -> Consolidated: Michelle Obama (Born on XYZ)
     """
 
+    def __init__(self, settings=None):
+        self.settings = settings or config.get_snapshot()  # ConfigSnapshot
+
     def __get_attribute_count(self, reference):
         count = 0
         skip_attrs = ['group_id', 'merged_name']
@@ -97,13 +102,14 @@ class CrossDocumentLinkage(object):
         return count
 
     def resolve(self, references):
-        normalize_names = config.get('RECORD_LINKAGE_NORMALIZE_NAMES')
+        if not references:
+            return []  # eg. documents without any person
 
-        if normalize_names and normalize_names.lower() == 'true':
+        if self.settings.record_linkage_normalize_names:
             Utils.normalize_text_properties(NAME_PROPERTIES, references)
 
-        comp_algorithm = config.get('NAME_COMPARISON_ALGORITHM')
-        comp_threshold = float(config.get('NAME_COMPARISON_THRESHOLD_OVERALL'))
+        comp_algorithm = self.settings.name_comparison_algorithm
+        comp_threshold = self.settings.name_comparison_threshold_overall
         link = RecordLinkage(references, "res_and_group_id")
 
         link.add_comparator(String('first_name', 'first_name', method=comp_algorithm, threshold=comp_threshold, label='first_name'))
@@ -1,12 +1,17 @@
 import re
 import logging
+from spacy_utils import SpacyUtils
 logger = logging.getLogger('logger')
 
+spacy_utils = SpacyUtils()
+
 
 class RegexRule(object):
 
-    def __init__(self, regex, group, normalizer=None, maskerizer=None, desc=None):
+    def __init__(self, regex, group, normalizer=None, maskerizer=None, desc=None, name=None):
+        self.name = name  # passed to the normalizer (eg. as the source of a relationship)
         self.regex = regex
+        self.pattern = re.compile(regex, re.IGNORECASE)  # compiled once, when the rule is added
         self.group = group
         self.normalizer = normalizer
         self.maskerizer = maskerizer
@@ -14,6 +19,13 @@ class RegexRule(object):
 
 
 class RegexHandler(object):
+    """
+    Executes the rules of each identifier against the text of a span.
+    Each distinct mask is applied once per span, and the rules sharing the same regex and mask (eg. with different
+    capture groups or normalizers) are evaluated with a single search.
+    When executed against a spaCy span, normalizers also receive the token where the captured group starts ('match'),
+    found through the character offsets of the match, and the name of the rule ('rule').
+    """
 
     def __init__(self):
         self.rules = {}
@@ -21,18 +33,44 @@ class RegexHandler(object):
     def get_keys(self):
         return self.rules.keys()
 
-    def add_rule(self, identifier, regex, group, normalizer=None, maskerizer=None, postprocessor=None, desc=None):
-        rule = RegexRule(regex, group, normalizer=normalizer, maskerizer=maskerizer, desc=desc)
+    def add_rule(self, identifier, regex, group, normalizer=None, maskerizer=None, postprocessor=None, desc=None,
+                 name=None):
+        rule = RegexRule(regex, group, normalizer=normalizer, maskerizer=maskerizer, desc=desc, name=name)
         if identifier in self.rules:
             self.rules[identifier].append(rule)
         else:
             self.rules[identifier] = [rule]
 
-    def __process_maskerizer(self, rule, span):
-        return rule.maskerizer.apply_mask(span) if rule.maskerizer else str(span)
+    def __process_maskerizer(self, rule, span, texts):
+        if rule.maskerizer not in texts:
+            texts[rule.maskerizer] = rule.maskerizer.apply_mask(span) if rule.maskerizer else str(span)
+            logger.debug("Text after mask: %s", texts[rule.maskerizer])
+        return texts[rule.maskerizer]
+
+    def __search(self, rule, span, texts, matches):
+        key = (rule.regex, rule.maskerizer)
+        if key not in matches:
+            matches[key] = rule.pattern.search(self.__process_maskerizer(rule, span, texts))
+        return matches[key]
 
-    def __process_normalizer(self, rule, span, result):
-        return rule.normalizer.normalize(span=span, result=result) if rule.normalizer else result
+    def __process_normalizer(self, rule, span, result, match):
+        if not rule.normalizer:
+            return result
+        return rule.normalizer.normalize(span=span, result=result, match=self.__get_match_token(rule, span, match),
+                                         rule=rule.name)
+
+    def __get_match_token(self, rule, span, match):
+        # Only groups made of a whole token are mapped (eg. not "son" within "Johnson" or the person mask)
+        if not hasattr(span, 'doc'):
+            return None
+        offset = match.start(rule.group)
+        if rule.maskerizer:
+            char = rule.maskerizer.get_char_offset(span, offset)
+        else:
+            char = span.start_char + offset
+        token = spacy_utils.get_token_at(span.doc, char)
+        if token is not None and token.idx == char and token.text == match.group(rule.group):
+            return token
 
     def __aggregate_results(self, key, results):
         if key in results:
@@ -42,17 +80,21 @@ class RegexHandler(object):
                 logger.debug("Regex Handler: multiple results for same key!")
 
     def execute(self, span):
+        return self.execute_rules(self.rules, span)
+
+    def execute_rules(self, rules, span):
+        """Executes the given rules ({identifier: [rule]}, eg. a subset of the rules of the handler)"""
         results = {}
-        for key, rules_group in self.rules.items():
+        texts = {}  # maskerizer -> text of the span
+        matches = {}  # (regex, maskerizer) -> match
+        for key, rules_group in rules.items():
             logger.debug("Executing rule id: [%s]", key)
             for rule in rules_group:
-                text = self.__process_maskerizer(rule, span)
-                logger.debug("Text after mask: %s", text)
-                match = re.search(rule.regex, text, re.IGNORECASE)
+                match = self.__search(rule, span, texts, matches)
                 if match:
                     found = match.group(rule.group)
                     logger.info("Pattern matched [%s] - Span: %s", found, span)
-                    result = self.__process_normalizer(rule, span, found)
+                    result = self.__process_normalizer(rule, span, found, match)
                     if result:
                         if key in results:
                             results[key].append(result)
@@ -1,37 +1,169 @@
+import bisect
+import collections
+import enum
 import logging
+import re
 import regex_handler
+from matcher_handler import MatcherHandler
 from spacy_utils import SpacyUtils
 from regex_constants import *
 from constants import *
 from utils import Utils
 
 logger = logging.getLogger('logger')
-
-rel_map = {'married': 'spouse_of',
-           'remarried': 'spouse_of',
-           'wife': 'spouse_of',
-           'husband': 'spouse_of',
-           'sister': 'sibling_of',
-           'brother': 'sibling_of',
-           'father': 'father_of',
-           'grandfather': 'grandfather_of',
-           'mother': 'mother_of',
-           'grandmother': 'grandmother_of',
-           'son': 'child_of',
-           'grandson': 'grandson_of',
-           'daughter': 'child_of',
-           'granddaughter': 'granddaughter_of',
-           'born': 'child_of',
-           'parents': 'child_of',
-           'cousin': 'cousin_of',
-           'uncle': 'uncle_of',
-           'aunt': 'aunt_of',
-           'nephew': 'nephew_of',
-           'niece': 'niece_of',
+config = ConfigHandler()
+
+
+class Predicate(enum.Enum):
+    SPOUSE_OF = 'spouse_of'
+    SIBLING_OF = 'sibling_of'
+    FATHER_OF = 'father_of'
+    GRANDFATHER_OF = 'grandfather_of'
+    MOTHER_OF = 'mother_of'
+    GRANDMOTHER_OF = 'grandmother_of'
+    CHILD_OF = 'child_of'
+    GRANDSON_OF = 'grandson_of'
+    GRANDDAUGHTER_OF = 'granddaughter_of'
+    COUSIN_OF = 'cousin_of'
+    UNCLE_OF = 'uncle_of'
+    AUNT_OF = 'aunt_of'
+    NEPHEW_OF = 'nephew_of'
+    NIECE_OF = 'niece_of'
+
+
+class Relation(collections.namedtuple('Relation', ['subject_start', 'subject_end', 'predicate', 'object_start',
+                                                   'object_end', 'source'])):
+    """
+    Relationship between two person mentions, given by their character offsets in the document.
+    The source is the name of the rule (regex or token pattern) that extracted it (eg. 'marry', 'born_to').
+    Its string is the former representation of the relationships, eg. [420:428],sibling_of,[476:490]
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_spans(cls, subject, predicate, obj, source):
+        return cls(subject.start_char, subject.end_char, predicate, obj.start_char, obj.end_char, source)
+
+    def get_subject_offset(self):
+        return self.subject_start, self.subject_end
+
+    def get_object_offset(self):
+        return self.object_start, self.object_end
+
+    def __str__(self):
+        return "[{0}:{1}],{2},[{3}:{4}]".format(self.subject_start, self.subject_end, self.predicate.value,
+                                               self.object_start, self.object_end)
+
+
+rel_map = {'married': Predicate.SPOUSE_OF,
+           'remarried': Predicate.SPOUSE_OF,
+           'wife': Predicate.SPOUSE_OF,
+           'husband': Predicate.SPOUSE_OF,
+           'sister': Predicate.SIBLING_OF,
+           'brother': Predicate.SIBLING_OF,
+           'father': Predicate.FATHER_OF,
+           'grandfather': Predicate.GRANDFATHER_OF,
+           'mother': Predicate.MOTHER_OF,
+           'grandmother': Predicate.GRANDMOTHER_OF,
+           'son': Predicate.CHILD_OF,
+           'grandson': Predicate.GRANDSON_OF,
+           'daughter': Predicate.CHILD_OF,
+           'granddaughter': Predicate.GRANDDAUGHTER_OF,
+           'born': Predicate.CHILD_OF,
+           'parents': Predicate.CHILD_OF,
+           'cousin': Predicate.COUSIN_OF,
+           'uncle': Predicate.UNCLE_OF,
+           'aunt': Predicate.AUNT_OF,
+           'nephew': Predicate.NEPHEW_OF,
+           'niece': Predicate.NIECE_OF,
            }
 
 spacy_utils = SpacyUtils()
 
+# Years and keywords the date patterns depend on, found in a single scan of the text
+DATE_TRIGGER_REGEX = re.compile(f"(?P<year>{REGEX_YEAR_PATTERN})|(?P<born>{REGEX_BORN_PATTERN})|(?P<died>died)",
+                                re.IGNORECASE)
+
+# The prefilters below tell whether a resolver group can match the text after a person, given the (casefolded) text
+# of its sentence and the number of persons in it. They only look for substrings the patterns require.
+NEE_REGEX = re.compile(REGEX_NAME_NEE, re.IGNORECASE)
+DIGIT_REGEX = re.compile("[0-9]")
+# "son" is also found in the "_PERSON_" mask, so three persons are enough for REGEX_PERSON_RELATIVES to match
+RELATION_KEYWORDS = ['married', 'born'] + REGEX_RELATIVES.split("|")
+RELATION_MASK_MIN_PERSONS = 3
+
+
+def can_match_attributes(text, person_count):
+    return '"' in text or NEE_REGEX.search(text) is not None
+
+
+def can_match_dates(text, person_count):
+    return DIGIT_REGEX.search(text) is not None or 'born' in text or 'b.' in text
+
+
+def can_match_relations(text, person_count):
+    return person_count >= RELATION_MASK_MIN_PERSONS or any(keyword in text for keyword in RELATION_KEYWORDS)
+
+
+def can_match_alternative_marriage(text, person_count):
+    return 'married' in text and 'and' in text
+
+
+def can_match_relation_pairs(text, person_count):
+    return 'and' in text
+
+
+# Date pattern -> (minimum number of years, required keyword) for the pattern to match
+DATE_PATTERN_REQUIREMENTS = {
+    REGEX_YOB_YOD_PATTERN: (2, None),
+    REGEX_BORN_YEAR: (1, 'born'),
+    REGEX_BORN_IN_YEAR: (1, 'born'),
+    REGEX_DIED_IN_YEAR: (1, 'died'),
+    REGEX_BORN_MONTH: (0, 'born'),
+    REGEX_BORN_DAY: (1, 'born'),
+    REGEX_FULL_DOB_DOD_PATTERN: (2, None),
+    REGEX_FULL_DOB_DOD_DF_PATTERN: (2, None),
+    REGEX_YOB_DOD_PATTERN: (2, None),
+    REGEX_FULL_DOB_PARTIAL_DOD: (2, None),
+    REGEX_FULL_DOB_YOD: (2, None),
+}
+
+
+# Token (spaCy Matcher) equivalents of the relationship regexes, as (pattern, index of the keyword spec).
+# Keywords must be whole tokens, so hyphenated relatives (eg. great-grandson) are matched by their last word.
+PERSON_TOKEN = {"_": {"is_person_part": True}}
+ANY_TOKENS = {"OP": "*"}
+
+
+def keyword_token(*words):
+    return {"LOWER": {"IN": list(words)}}
+
+
+RELATION_TOKEN_PATTERNS = {
+    'marry': ([PERSON_TOKEN, ANY_TOKENS, keyword_token('remarried', 'married'), ANY_TOKENS, PERSON_TOKEN], 2),
+    'marry_alt': ([PERSON_TOKEN, ANY_TOKENS, keyword_token('and'), ANY_TOKENS, PERSON_TOKEN, ANY_TOKENS,
+                   keyword_token('remarried', 'married')], 6),
+    'relatives': ([PERSON_TOKEN, ANY_TOKENS, keyword_token(*REGEX_RELATIVES.split("|")), ANY_TOKENS, PERSON_TOKEN], 2),
+    'children_pair': ([PERSON_TOKEN, ANY_TOKENS, keyword_token('son', 'daughter'), ANY_TOKENS, PERSON_TOKEN,
+                       ANY_TOKENS, keyword_token('and'), ANY_TOKENS, PERSON_TOKEN], 2),
+    'born_to': ([PERSON_TOKEN, ANY_TOKENS, keyword_token('born'), ANY_TOKENS, keyword_token('to'), ANY_TOKENS,
+                 PERSON_TOKEN], 2),
+    'born_to_pair': ([PERSON_TOKEN, ANY_TOKENS, keyword_token('born'), ANY_TOKENS, keyword_token('to'), ANY_TOKENS,
+                      PERSON_TOKEN, ANY_TOKENS, keyword_token('and'), ANY_TOKENS, PERSON_TOKEN], 2),
+    'parents_pair': ([PERSON_TOKEN, ANY_TOKENS, keyword_token('parents'), ANY_TOKENS, keyword_token('were'),
+                      ANY_TOKENS, PERSON_TOKEN, ANY_TOKENS, keyword_token('and'), ANY_TOKENS, PERSON_TOKEN], 2),
+}
+# Relationship regex -> name of its token pattern (as set in RELATION_MATCHER_RULES)
+RELATION_PATTERN_NAMES = {
+    REGEX_PERSON_MARRY: 'marry',
+    REGEX_PERSON_MARRY_ALT: 'marry_alt',
+    REGEX_PERSON_RELATIVES: 'relatives',
+    REGEX_PERSON_CHILDREN_PAIR: 'children_pair',
+    REGEX_PERSON_BORN_TO: 'born_to',
+    REGEX_PERSON_BORN_TO_PAIR: 'born_to_pair',
+    REGEX_PERSON_PARENTS_PAIR: 'parents_pair',
+}
+
 
 class RelationExtraction(object):
     """
@@ -42,16 +174,26 @@ class RelationExtraction(object):
     {
         [0:8]: {'year_of_birth': 1987, 'month_of_birth': 03}
     }
+
+    The relationship patterns listed in RELATION_MATCHER_RULES (eg. ['marry', 'born_to']) are executed as token
+    patterns (MatcherHandler) instead of regexes over the masked text.
     """
 
-    def __init__(self):
+    def __init__(self, settings=None):
+        settings = settings or config.get_snapshot()  # ConfigSnapshot
+        self.matcher_rules = set(settings.relation_matcher_rules)
+        unknown_rules = self.matcher_rules - set(RELATION_TOKEN_PATTERNS)
+        if unknown_rules:
+            raise ValueError("Unknown relation matcher rules {0}, expected some of {1}".format(
+                sorted(unknown_rules), sorted(RELATION_TOKEN_PATTERNS)))
         self.resolvers = self.__get_resolvers()
 
     def extract(self, person_spans):
         relationships = {}
+        sentence_resolvers = {}  # (start, end) of a sentence -> resolvers that can match in it
         for person_span in person_spans:
             results = []
-            for resolver in self.resolvers:
+            for resolver in self.__get_sentence_resolvers(person_span, sentence_resolvers):
                 logger.debug("Executing resolver for person_span: %s", person_span)
                 res = resolver.execute(person_span)
                 logger.debug("Successfully executed resolver for person %s: %s", person_span, res)
@@ -60,98 +202,158 @@ class RelationExtraction(object):
             relationships[person_span] = Utils.merge_dictionaries(results)
         return relationships
 
+    def __get_sentence_resolvers(self, span, sentence_resolvers):
+        # Resolvers are skipped in sentences without any of the keywords (or digits) their patterns require
+        sentence, persons, _ = spacy_utils.get_person_index(span.doc).get_window(span)
+        key = (sentence.start, sentence.end)
+        if key not in sentence_resolvers:
+            text = sentence.text.casefold()
+            sentence_resolvers[key] = [resolver for resolver in self.resolvers if resolver.can_match(text, len(persons))]
+            logger.debug("Resolvers for sentence [%s]: %s of %s", sentence, len(sentence_resolvers[key]),
+                         len(self.resolvers))
+        return sentence_resolvers[key]
+
     def __get_resolvers(self):
         resolvers = []
 
-        attr_res = AttrResolverGroup(min_ents=1, max_tokens=4, mode="after_span", person_only=True)
+        attr_res = AttrResolverGroup(min_ents=1, max_tokens=4, mode="after_span", person_only=True,
+                                     prefilter=can_match_attributes)
         attr_res.add_expr(id="nee", expr=REGEX_NAME_NEE, group=1)
         attr_res.add_expr(id="nickname", expr=REGEX_ENCLOSED_BY_DB_QUOTES, group=1)
         resolvers.append(attr_res)
 
-        month_norm = MonthAttributeNormalizer()
-        date_res = AttrResolverGroup(min_ents=1, max_tokens=10, mode="after_span", stop_before_next_ent=True)
-        date_res.add_expr(id="yob", expr=REGEX_YOB_YOD_PATTERN, group=1, desc="Matches (1942–1995), Captures 1942")
-        date_res.add_expr(id="yob", expr=REGEX_BORN_YEAR, group=1, desc="Matches (born 1998), (b. July 30, 1998) - Captures 1998")
-        date_res.add_expr(id="yob", expr=REGEX_BORN_IN_YEAR, group=1, desc="Matches (born in 1928) - Captures 1928")
-        date_res.add_expr(id="yod", expr=REGEX_YOB_YOD_PATTERN, group=2, desc="Matches (1942–1995) - Captures 1995")
-        date_res.add_expr(id="yod", expr=REGEX_DIED_IN_YEAR, group=1, desc="Matches (died in 1928) - Captures 1928")
-        date_res.add_expr(id="mob", expr=REGEX_BORN_MONTH, group=1, normalizer=month_norm, desc="Matches (born August 4, 1961), (b. August 30, 1937) - Captures August")
-        date_res.add_expr(id="dob", expr=REGEX_BORN_DAY, group=1, desc="Matches (born August 4, 1961), (b. July 4, 1937) - Captures 4")
-
-        # For (May 5, 1762 – July 20, 1843)
-        date_res.add_expr(id="mob", expr=REGEX_FULL_DOB_DOD_PATTERN, group=1, normalizer=month_norm)
-        date_res.add_expr(id="dob", expr=REGEX_FULL_DOB_DOD_PATTERN, group=2)
-        date_res.add_expr(id="yob", expr=REGEX_FULL_DOB_DOD_PATTERN, group=3)
-        date_res.add_expr(id="mod", expr=REGEX_FULL_DOB_DOD_PATTERN, group=4, normalizer=month_norm)
-        date_res.add_expr(id="dod", expr=REGEX_FULL_DOB_DOD_PATTERN, group=5)
-        date_res.add_expr(id="yod", expr=REGEX_FULL_DOB_DOD_PATTERN, group=6)
-
-        # For (25 December 1737 – 18 April 1785)
-        date_res.add_expr(id="dob", expr=REGEX_FULL_DOB_DOD_DF_PATTERN, group=1)
-        date_res.add_expr(id="mob", expr=REGEX_FULL_DOB_DOD_DF_PATTERN, group=2, normalizer=month_norm)
-        date_res.add_expr(id="yob", expr=REGEX_FULL_DOB_DOD_DF_PATTERN, group=3)
-        date_res.add_expr(id="dod", expr=REGEX_FULL_DOB_DOD_DF_PATTERN, group=4)
-        date_res.add_expr(id="mod", expr=REGEX_FULL_DOB_DOD_DF_PATTERN, group=5, normalizer=month_norm)
-        date_res.add_expr(id="yod", expr=REGEX_FULL_DOB_DOD_DF_PATTERN, group=6)
-
-        # For (born 1653 - May 25, 1709) or (1653 - May 25, 1709)
-        date_res.add_expr(id="yob", expr=REGEX_YOB_DOD_PATTERN, group=1)
-        date_res.add_expr(id="mod", expr=REGEX_YOB_DOD_PATTERN, group=2, normalizer=month_norm)
-        date_res.add_expr(id="dod", expr=REGEX_YOB_DOD_PATTERN, group=3)
-        date_res.add_expr(id="yod", expr=REGEX_YOB_DOD_PATTERN, group=4)
-
-        # For (May 13, 1744 – May 1786)
-        date_res.add_expr(id="mob", expr=REGEX_FULL_DOB_PARTIAL_DOD, group=1, normalizer=month_norm)
-        date_res.add_expr(id="dob", expr=REGEX_FULL_DOB_PARTIAL_DOD, group=2)
-        date_res.add_expr(id="yob", expr=REGEX_FULL_DOB_PARTIAL_DOD, group=3)
-        date_res.add_expr(id="mod", expr=REGEX_FULL_DOB_PARTIAL_DOD, group=4, normalizer=month_norm)
-        date_res.add_expr(id="yod", expr=REGEX_FULL_DOB_PARTIAL_DOD, group=5)
-
-        # For (January 26, 1644-1695)
-        date_res.add_expr(id="mob", expr=REGEX_FULL_DOB_YOD, group=1, normalizer=month_norm)
-        date_res.add_expr(id="dob", expr=REGEX_FULL_DOB_YOD, group=2)
-        date_res.add_expr(id="yob", expr=REGEX_FULL_DOB_YOD, group=3)
-        date_res.add_expr(id="yod", expr=REGEX_FULL_DOB_YOD, group=4)
-
+        date_res = AttrResolverGroup(min_ents=1, max_tokens=10, mode="after_span", stop_before_next_ent=True,
+                                     handler=DateExtractor(), prefilter=can_match_dates)
         resolvers.append(date_res)
 
-        rel_res = AttrResolverGroup(min_ents=2, max_tokens=1000, mode="start_span")
+        rel_res = AttrResolverGroup(min_ents=2, max_tokens=1000, mode="start_span", prefilter=can_match_relations)
         mask = PersonMaskerizer()
         rel_norm = RelationshipNormalizer()
-        rel_res.add_expr(id="rel", expr=REGEX_PERSON_MARRY, group=1, mask=mask, normalizer=rel_norm)
-        rel_res.add_expr(id="rel", expr=REGEX_PERSON_RELATIVES, group=1, mask=mask, normalizer=rel_norm)
+        self.__add_relation_expr(rel_res, REGEX_PERSON_MARRY, mask, rel_norm)
+        self.__add_relation_expr(rel_res, REGEX_PERSON_RELATIVES, mask, rel_norm)
 
 
         born_to_norm = BornToNormalizer(False)
-        rel_res.add_expr(id="rel", expr=REGEX_PERSON_BORN_TO, group=1, mask=mask, normalizer=born_to_norm)
+        self.__add_relation_expr(rel_res, REGEX_PERSON_BORN_TO, mask, born_to_norm)
         resolvers.append(rel_res)
 
-        rel_res_alt = AttrResolverGroup(min_ents=2, max_tokens=20, mode="start_span", force_max_tokens=True)
-        rel_res_alt.add_expr(id="rel", expr=REGEX_PERSON_MARRY_ALT, group=1, mask=mask, normalizer=rel_norm)
+        rel_res_alt = AttrResolverGroup(min_ents=2, max_tokens=20, mode="start_span", force_max_tokens=True,
+                                        prefilter=can_match_alternative_marriage)
+        self.__add_relation_expr(rel_res_alt, REGEX_PERSON_MARRY_ALT, mask, rel_norm)
         resolvers.append(rel_res_alt)
 
         # We execute the following twice to capture both parents
-        rel_pair_res = AttrResolverGroup(min_ents=3, max_tokens=1000, mode="start_span")
+        rel_pair_res = AttrResolverGroup(min_ents=3, max_tokens=1000, mode="start_span",
+                                         prefilter=can_match_relation_pairs)
         born_to_norm_2nd = BornToNormalizer(True)
-        rel_pair_res.add_expr(id="rel", expr=REGEX_PERSON_BORN_TO_PAIR, group=1, mask=mask, normalizer=born_to_norm)
-        rel_pair_res.add_expr(id="rel", expr=REGEX_PERSON_BORN_TO_PAIR, group=1, mask=mask, normalizer=born_to_norm_2nd)
+        self.__add_relation_expr(rel_pair_res, REGEX_PERSON_BORN_TO_PAIR, mask, born_to_norm)
+        self.__add_relation_expr(rel_pair_res, REGEX_PERSON_BORN_TO_PAIR, mask, born_to_norm_2nd)
 
-        rel_pair_res.add_expr(id="rel", expr=REGEX_PERSON_PARENTS_PAIR, group=1, mask=mask, normalizer=born_to_norm)
-        rel_pair_res.add_expr(id="rel", expr=REGEX_PERSON_PARENTS_PAIR, group=1, mask=mask, normalizer=born_to_norm_2nd)
+        self.__add_relation_expr(rel_pair_res, REGEX_PERSON_PARENTS_PAIR, mask, born_to_norm)
+        self.__add_relation_expr(rel_pair_res, REGEX_PERSON_PARENTS_PAIR, mask, born_to_norm_2nd)
 
         rel_norm_2nd = RelationshipNormalizer(target_second_person=True)
-        rel_pair_res.add_expr(id="rel", expr=REGEX_PERSON_CHILDREN_PAIR, group=1, mask=mask, normalizer=rel_norm)
-        rel_pair_res.add_expr(id="rel", expr=REGEX_PERSON_CHILDREN_PAIR, group=1, mask=mask, normalizer=rel_norm_2nd)
+        self.__add_relation_expr(rel_pair_res, REGEX_PERSON_CHILDREN_PAIR, mask, rel_norm)
+        self.__add_relation_expr(rel_pair_res, REGEX_PERSON_CHILDREN_PAIR, mask, rel_norm_2nd)
 
         resolvers.append(rel_pair_res)
         return resolvers
 
+    def __add_relation_expr(self, resolver, expr, mask, normalizer):
+        name = RELATION_PATTERN_NAMES[expr]
+        if name in self.matcher_rules:
+            pattern, trigger = RELATION_TOKEN_PATTERNS[name]
+            resolver.add_token_expr(id="rel", name=name, pattern=pattern, trigger=trigger, normalizer=normalizer)
+        else:
+            resolver.add_expr(id="rel", name=name, expr=expr, group=1, mask=mask, normalizer=normalizer)
+
+
+class DateExtractor(regex_handler.RegexHandler):
+    """
+    Extracts the dates of birth and death (yob, mob, dob, yod, mod, dod) after a person.
+    The text is scanned once for years and the born/died keywords, and only the patterns that can match are searched,
+    each one once for all the fields it captures. The results (and their order) are the same as executing every rule.
+    """
+
+    def __init__(self):
+        super(DateExtractor, self).__init__()
+        month_norm = MonthAttributeNormalizer()
+        self.add_rule("yob", REGEX_YOB_YOD_PATTERN, 1, desc="Matches (1942–1995), Captures 1942")
+        self.add_rule("yob", REGEX_BORN_YEAR, 1, desc="Matches (born 1998), (b. July 30, 1998) - Captures 1998")
+        self.add_rule("yob", REGEX_BORN_IN_YEAR, 1, desc="Matches (born in 1928) - Captures 1928")
+        self.add_rule("yod", REGEX_YOB_YOD_PATTERN, 2, desc="Matches (1942–1995) - Captures 1995")
+        self.add_rule("yod", REGEX_DIED_IN_YEAR, 1, desc="Matches (died in 1928) - Captures 1928")
+        self.add_rule("mob", REGEX_BORN_MONTH, 1, normalizer=month_norm, desc="Matches (born August 4, 1961), (b. August 30, 1937) - Captures August")
+        self.add_rule("dob", REGEX_BORN_DAY, 1, desc="Matches (born August 4, 1961), (b. July 4, 1937) - Captures 4")
+
+        # For (May 5, 1762 – July 20, 1843)
+        self.add_rule("mob", REGEX_FULL_DOB_DOD_PATTERN, 1, normalizer=month_norm)
+        self.add_rule("dob", REGEX_FULL_DOB_DOD_PATTERN, 2)
+        self.add_rule("yob", REGEX_FULL_DOB_DOD_PATTERN, 3)
+        self.add_rule("mod", REGEX_FULL_DOB_DOD_PATTERN, 4, normalizer=month_norm)
+        self.add_rule("dod", REGEX_FULL_DOB_DOD_PATTERN, 5)
+        self.add_rule("yod", REGEX_FULL_DOB_DOD_PATTERN, 6)
+
+        # For (25 December 1737 – 18 April 1785)
+        self.add_rule("dob", REGEX_FULL_DOB_DOD_DF_PATTERN, 1)
+        self.add_rule("mob", REGEX_FULL_DOB_DOD_DF_PATTERN, 2, normalizer=month_norm)
+        self.add_rule("yob", REGEX_FULL_DOB_DOD_DF_PATTERN, 3)
+        self.add_rule("dod", REGEX_FULL_DOB_DOD_DF_PATTERN, 4)
+        self.add_rule("mod", REGEX_FULL_DOB_DOD_DF_PATTERN, 5, normalizer=month_norm)
+        self.add_rule("yod", REGEX_FULL_DOB_DOD_DF_PATTERN, 6)
+
+        # For (born 1653 - May 25, 1709) or (1653 - May 25, 1709)
+        self.add_rule("yob", REGEX_YOB_DOD_PATTERN, 1)
+        self.add_rule("mod", REGEX_YOB_DOD_PATTERN, 2, normalizer=month_norm)
+        self.add_rule("dod", REGEX_YOB_DOD_PATTERN, 3)
+        self.add_rule("yod", REGEX_YOB_DOD_PATTERN, 4)
+
+        # For (May 13, 1744 – May 1786)
+        self.add_rule("mob", REGEX_FULL_DOB_PARTIAL_DOD, 1, normalizer=month_norm)
+        self.add_rule("dob", REGEX_FULL_DOB_PARTIAL_DOD, 2)
+        self.add_rule("yob", REGEX_FULL_DOB_PARTIAL_DOD, 3)
+        self.add_rule("mod", REGEX_FULL_DOB_PARTIAL_DOD, 4, normalizer=month_norm)
+        self.add_rule("yod", REGEX_FULL_DOB_PARTIAL_DOD, 5)
+
+        # For (January 26, 1644-1695)
+        self.add_rule("mob", REGEX_FULL_DOB_YOD, 1, normalizer=month_norm)
+        self.add_rule("dob", REGEX_FULL_DOB_YOD, 2)
+        self.add_rule("yob", REGEX_FULL_DOB_YOD, 3)
+        self.add_rule("yod", REGEX_FULL_DOB_YOD, 4)
+
+    def execute(self, span):
+        text = str(span)
+        years = 0
+        keywords = set()
+        for match in DATE_TRIGGER_REGEX.finditer(text):
+            if match.lastgroup == 'year':
+                years += 1
+            else:
+                keywords.add(match.lastgroup)
+        if not years and 'born' not in keywords:
+            return {}
+
+        rules = {}
+        for key, rules_group in self.rules.items():
+            applicable = [rule for rule in rules_group if self.__can_match(rule, years, keywords)]
+            if applicable:
+                rules[key] = applicable
+        return self.execute_rules(rules, span)
+
+    @staticmethod
+    def __can_match(rule, years, keywords):
+        min_years, keyword = DATE_PATTERN_REQUIREMENTS[rule.regex]
+        return years >= min_years and (keyword is None or keyword in keywords)
+
 
 class AttrResolverGroup(object):
 
     def __init__(self, min_ents=None, mode="after", max_tokens=None, person_only=False, stop_before_next_ent=False,
-                 force_max_tokens=False):
-        self.handler = regex_handler.RegexHandler()
+                 force_max_tokens=False, handler=None, prefilter=None):
+        self.handler = handler or regex_handler.RegexHandler()
+        self.matcher_handler = None  # MatcherHandler, created when a token pattern is added
+        # Optional function (sentence text, number of persons) telling whether the patterns can match in a sentence
+        self.prefilter = prefilter
         self.min_entities = min_ents
         # Truncate the text to prevent capturing data from other entities? Defaults to False
         self.stop_before_next_ent = stop_before_next_ent
@@ -161,58 +363,69 @@ class AttrResolverGroup(object):
         self.max_tokens = max_tokens
         self.force_max_tokens = force_max_tokens
 
-    def __get_starting_point(self, span):
+    def __get_starting_point(self, span, sentence):
         if self.mode == "after_span":
             return span.end
         elif self.mode == "start_span":
             return span.start
         elif self.mode == "start_sent":
-            return span.sent.start
+            return sentence.start
 
-    def add_expr(self, id=None, expr=None, group=0, normalizer=None, mask=None, postprocessor=None, desc=None):
-        self.handler.add_rule(id, expr, group, normalizer=normalizer, maskerizer=mask, postprocessor=postprocessor, desc=desc)
+    def can_match(self, sentence_text, person_count):
+        return self.prefilter is None or self.prefilter(sentence_text, person_count)
+
+    def add_expr(self, id=None, expr=None, group=0, normalizer=None, mask=None, postprocessor=None, desc=None,
+                 name=None):
+        self.handler.add_rule(id, expr, group, normalizer=normalizer, maskerizer=mask, postprocessor=postprocessor,
+                              desc=desc, name=name)
+
+    def add_token_expr(self, id=None, name=None, pattern=None, trigger=0, normalizer=None, desc=None):
+        if self.matcher_handler is None:
+            self.matcher_handler = MatcherHandler()
+        self.matcher_handler.add_rule(id, name, pattern, trigger, normalizer=normalizer, desc=desc)
 
     def execute(self, span):
         if self.person_only and str(span).lower() in PRONOUNS:
             return
 
-        logger.debug("Checking if at least %s entities are found for %s in sentence [%s]", self.min_entities, span.sent)
-        ents = list(set(filter(None, [token._.get_person for token in span.sent])))
+        # The sentence and its persons (sorted by start) come from the index built with the person entities
+        sentence, sorted_ents, position = spacy_utils.get_person_index(span.doc).get_window(span)
+        logger.debug("Checking if at least %s entities are found for %s in sentence [%s]", self.min_entities, span,
+                     sentence)
 
-        logger.debug("# of entities found: %s", len(ents))
-        if len(ents) < self.min_entities:
+        logger.debug("# of entities found: %s", len(sorted_ents))
+        if len(sorted_ents) < self.min_entities:
             return
 
-        start = self.__get_starting_point(span)
-        sorted_ents = sorted(ents, key=lambda k: k.start)
-        next_ent = sorted_ents.index(span) + (self.min_entities - 1)
+        start = self.__get_starting_point(span, sentence)
+        next_ent = position + (self.min_entities - 1)
+        next_ent_start = sorted_ents[position + 1].start if position + 1 < len(sorted_ents) else 0
 
-        try:
-            next_ent_start = sorted_ents[sorted_ents.index(span) + 1].start
-        except IndexError:
-            next_ent_start = 0
-
-        if len(ents) > 1 and self.stop_before_next_ent and next_ent_start > 0 and not self.force_max_tokens:
-            found_span = span.sent.doc[start:next_ent_start] \
+        if len(sorted_ents) > 1 and self.stop_before_next_ent and next_ent_start > 0 and not self.force_max_tokens:
+            found_span = span.doc[start:next_ent_start] \
                 if (next_ent_start - start) < self.max_tokens \
                 else span.doc[start:span.end + self.max_tokens]
         elif self.min_entities != 1 and len(sorted_ents) - 1 >= next_ent and not self.force_max_tokens:
-            found_span = span.sent.doc[start:sorted_ents[next_ent].end]
+            found_span = span.doc[start:sorted_ents[next_ent].end]
         else:
-            found_span = span.doc[start:span.sent.end] \
-                if (span.sent.end - span.end) < self.max_tokens \
+            found_span = span.doc[start:sentence.end] \
+                if (sentence.end - span.end) < self.max_tokens \
                 else span.doc[start:span.end + self.max_tokens]
 
         text_span = str(found_span).strip()
         if not text_span or text_span == '.':
             return
-        logger.debug("Executing pattern for span [%s] against text [%s] with original sentence [%s]", span, found_span, span.sent)
-        return self.handler.execute(found_span)
+        logger.debug("Executing pattern for span [%s] against text [%s] with original sentence [%s]", span, found_span, sentence)
+        results = self.handler.execute(found_span)
+        if self.matcher_handler:
+            for key, values in self.matcher_handler.execute(found_span).items():
+                results.setdefault(key, []).extend(values)
+        return results
 
 
 class MonthAttributeNormalizer(object):
 
-    def normalize(self, span=None, result=None):
+    def normalize(self, span=None, result=None, match=None, rule=None):
         if isinstance(result, int) or result.isdigit():
             return int(result)
         key = str(result).upper()[0:3]
@@ -223,23 +436,38 @@ class MonthAttributeNormalizer(object):
 class PersonMaskerizer(object):
 
     def apply_mask(self, span):
+        masked_text, _ = self.__mask(span)
+        return masked_text
+
+    def get_char_offset(self, span, offset):
+        """Character of the document at an offset of the masked text (the start of the person, within a mask)"""
+        _, pieces = self.__mask(span)
+        masked_start, char_start, masked = pieces[bisect.bisect_right(pieces, (offset, float('inf'))) - 1]
+        return char_start if masked else char_start + offset - masked_start
+
+    def __mask(self, span):
+        # Masked text and its pieces: (offset in the masked text, offset in the document, is a mask)
         tokens_to_mask = set()
         for token in span:
             if spacy_utils.get_attr(token=token, attr_name='is_person_part', ext=True):
                 tokens_to_mask.add(token)
         masked_text = ""
+        pieces = []
         should_add = True
         for token in span:
             if not should_add and token in tokens_to_mask:
                 continue
             if token in tokens_to_mask:
+                pieces.append((len(masked_text), token.idx, True))
                 masked_text += '_PERSON_'
+                pieces.append((len(masked_text), token.idx + len(token), False))
                 masked_text += token.whitespace_
                 should_add = False
             else:
+                pieces.append((len(masked_text), token.idx, False))
                 masked_text += token.text_with_ws
                 should_add = True
-        return masked_text
+        return masked_text, pieces
 
 
 class BornToNormalizer(object):
@@ -250,10 +478,11 @@ class BornToNormalizer(object):
     def is_nominal_subject(self, person):
         return any(token.dep_ == 'nsubj' for token in person)
 
-    def normalize(self, span=None, result=None):
+    def normalize(self, span=None, result=None, match=None, rule=None):
         logger.debug("Postprocessing result for [%s] and [%s]", span, result)
-        match = spacy_utils.find_element(span=span, start_at=span.start, mode="forward", attr_key="text",
-                                         attr_val=result, max_tokens=100)
+        if match is None:
+            match = spacy_utils.find_element(span=span, start_at=span.start, mode="forward", attr_key="text",
+                                             attr_val=result, max_tokens=100)
         if not match:
             logger.debug("Could not find match for: %s", result)
             return None
@@ -269,11 +498,8 @@ class BornToNormalizer(object):
 
         logger.debug("Found entities: [%s] and [%s]", left, right)
         if left and right:
-            left_final = spacy_utils.get_span_range(left._.get_person)
-            right_final = spacy_utils.get_span_range(right._.get_person)
             rel_mapping = rel_map[result.strip().lower()]
-            result = "[{0}],{1},[{2}]".format(left_final, rel_mapping, right_final)
-            return result
+            return Relation.from_spans(left._.get_person, rel_mapping, right._.get_person, rule)
         else:
             logger.debug("Could not find one of the sides in the relationship")
 
@@ -289,10 +515,11 @@ class RelationshipNormalizer(object):
     def is_possessive(self, person):
         return any(token.dep_ == 'poss' for token in person)
 
-    def normalize(self, span=None, result=None):
+    def normalize(self, span=None, result=None, match=None, rule=None):
         logger.debug("Postprocessing result for [%s] and [%s]", span, result)
-        match = spacy_utils.find_element(span=span, start_at=span.start, mode="forward", attr_key="text",
-                                         attr_val=result, max_tokens=100)
+        if match is None:
+            match = spacy_utils.find_element(span=span, start_at=span.start, mode="forward", attr_key="text",
+                                             attr_val=result, max_tokens=100)
         if not match:
             logger.debug("Could not find match for: %s", result)
             return None
@@ -314,27 +541,22 @@ class RelationshipNormalizer(object):
         if left and right:
             person_left = left._.get_person
             person_right = right._.get_person
-            left_final = spacy_utils.get_span_range(person_left)
-            right_final = spacy_utils.get_span_range(person_right)
             rel_mapping = rel_map[result.strip().lower()]
-            result = None
-            if self.is_nominal_subject(person_left) or self.is_possessive(person_left):
-                result = "[{0}],{1},[{2}]".format(left_final, rel_mapping, right_final)
-            elif self.is_nominal_subject(person_right) or self.is_possessive(person_right):
-                result = "[{0}],{1},[{2}]".format(right_final, rel_mapping, left_final)
-            else:
-                result = "[{0}],{1},[{2}]".format(left_final, rel_mapping, right_final)
-            return result
+            if not (self.is_nominal_subject(person_left) or self.is_possessive(person_left)) and \
+                    (self.is_nominal_subject(person_right) or self.is_possessive(person_right)):
+                return Relation.from_spans(person_right, rel_mapping, person_left, rule)
+            return Relation.from_spans(person_left, rel_mapping, person_right, rule)
         else:
             logger.debug("Could not find one of the sides in the relationship")
 
 
 class MarriedNormalizer(object):
 
-    def normalize(self, span=None, result=None):
+    def normalize(self, span=None, result=None, match=None, rule=None):
         logger.debug("Postprocessing result for [%s] and [%s]", span, result)
-        match = spacy_utils.find_element(span=span, start_at=span.start, mode="forward", attr_key="text",
-                                         attr_val=result, max_tokens=100)
+        if match is None:
+            match = spacy_utils.find_element(span=span, start_at=span.start, mode="forward", attr_key="text",
+                                             attr_val=result, max_tokens=100)
         if not match:
             logger.debug("Could not find match for: %s", result)
             return None
@@ -352,8 +574,4 @@ class MarriedNormalizer(object):
 
         entries = list(entries)
         rel_mapping = rel_map[result.strip().lower()]
-        template = "{0}:{1}"
-        left = template.format(entries[0].start_char, entries[0].end_char)
-        right = template.format(entries[1].start_char, entries[1].end_char)
-        result = "[{0}],{1},[{2}]".format(left, rel_mapping, right)
-        return result
+        return Relation.from_spans(entries[0], rel_mapping, entries[1], rule)
@@ -0,0 +1,115 @@
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import spacy
+
+from spacy_helper import CrossDocumentResolution, DISABLED_COMPONENTS
+
+logger = logging.getLogger('logger')
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MODEL = "en_core_web_trf"
+WARM_UP_TEXT = "Michelle Obama (née Robinson; born January 17, 1964) married Barack Obama in 1992. She is an attorney."
+
+
+class ResolutionService(object):
+    """
+    Keeps the spaCy pipeline, the first names dataset and the relation resolvers loaded between requests.
+    A request contains either article names from the Wikipedia directory ('documents') or raw texts by id ('texts'),
+    and the response contains the resolved groups as consolidated persons.
+    """
+
+    def __init__(self, nlp, exclusion_map=None, doc_cache=None):
+        self.resolution = CrossDocumentResolution(nlp, exclusion_map=exclusion_map, doc_cache=doc_cache)
+
+    def warm_up(self):
+        # The first document processed pays for the lazy initialization of the pipeline components
+        self.resolve({'texts': {'warm_up': WARM_UP_TEXT}})
+
+    @staticmethod
+    def is_string_list(values):
+        return isinstance(values, list) and all(isinstance(value, str) for value in values)
+
+    def resolve(self, request):
+        if not isinstance(request, dict):
+            raise ValueError("The request must be a JSON object")
+        if 'texts' in request:
+            texts = request['texts']
+            if not isinstance(texts, dict) or not self.is_string_list(list(texts.values())):
+                raise ValueError("'texts' must map text ids to texts")
+            groups = self.resolution.resolve_texts([(text, {'text_id': text_id}) for text_id, text in texts.items()])
+        elif 'documents' in request:
+            if not self.is_string_list(request['documents']):
+                raise ValueError("'documents' must be a list of article names")
+            groups = self.resolution.resolve(request['documents'])
+        else:
+            raise ValueError("The request must contain either 'documents' or 'texts'")
+        return {'groups': [group.get_consolidated_person() for group in groups]}
+
+
+class ResolutionRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /resolve with {"documents": ["Michelle_Obama"]} or {"texts": {"id": "text"}}.
+    GET /health returns {"status": "ok"} once the service is ready.
+    """
+
+    service = None  # ResolutionService, shared by all requests
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.__send_json(200, {'status': 'ok'})
+        else:
+            self.__send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if self.path != '/resolve':
+            self.__send_json(404, {'error': 'Not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length).decode("utf8"))
+        except ValueError as e:
+            self.__send_json(400, {'error': "Invalid request: {0}".format(e)})
+            return
+        try:
+            self.__send_json(200, self.service.resolve(request))
+        except ValueError as e:
+            self.__send_json(400, {'error': str(e)})
+        except Exception as e:
+            logger.exception("Unable to resolve request")
+            self.__send_json(500, {'error': str(e)})
+
+    def __send_json(self, status, data):
+        # Dates and other non JSON values (eg. sets) are returned as strings
+        body = json.dumps(data, default=str).encode("utf8")
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    # Requests are handled one at a time, as the resolution shares the configuration and the person references
+    handler = type('BoundResolutionRequestHandler', (ResolutionRequestHandler,), {'service': service})
+    return HTTPServer((host, port), handler)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Resolution daemon keeping the models loaded between requests")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    args = parser.parse_args()
+
+    resolution_service = ResolutionService(spacy.load(args.model, disable=DISABLED_COMPONENTS))
+    resolution_service.warm_up()
+    server = create_server(resolution_service, host=args.host, port=args.port)
+    logger.error("Resolution server listening on %s:%s", args.host, args.port)
+    server.serve_forever()
@@ -1,6 +1,31 @@
+import collections
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
 from bs4 import BeautifulSoup
 
-from constants import WIKIPEDIA_DATA_LOCATION
+from constants import WIKIPEDIA_DATA_LOCATION, ConfigHandler
+
+config = ConfigHandler()
+
+WIKI_TEXT_SELECTOR = '#mw-content-text p'
+WIKI_ANCHOR_SELECTOR = '#mw-content-text p a'
+WIKI_EXCLUSION_SELECTORS = ['.reference', '.rt-commentedText', 'a[href*="Pronunciation_respelling_key"]']
+
+# XPath equivalents of the selectors above, used by the lxml backend
+WIKI_TEXT_XPATH = '//*[@id="mw-content-text"]//p'
+WIKI_EXCLUSION_XPATH = '//*[contains(concat(" ", normalize-space(@class), " "), " reference ")' \
+                       ' or contains(concat(" ", normalize-space(@class), " "), " rt-commentedText ")]' \
+                       ' | //a[contains(@href, "Pronunciation_respelling_key")]'
+
+ANCHOR_BASE_OFFSET = 10
+
+try:
+    import lxml.html
+    from lxml import etree
+    TEXT_XPATH = etree.XPath(WIKI_TEXT_XPATH)
+    EXCLUSION_XPATH = etree.XPath(WIKI_EXCLUSION_XPATH)
+except ImportError:
+    lxml = None
 
 
 class Anchor(object):
@@ -8,7 +33,7 @@ class Anchor(object):
     def __init__(self, element):
         self.text = element.text
         self.href = element['href']
-        self.title = element['title'] if 'title' in element else None
+        self.title = element['title'] if element.has_attr('title') else None
 
     def __repr__(self):
         return "Text: [{0}] Href: [{1}]".format(self.text, self.href)
@@ -41,7 +66,7 @@ class Scrapper(object):
                     s.extract()
         eles = soup.select(selector)
         for ele in eles:
-            if 'href' not in ele:
+            if not ele.has_attr('href'):
                 continue
             if 'index.php' not in ele['href']:
                 parent_text = ele.parent.text
@@ -58,16 +83,209 @@ class Scrapper(object):
         return anchors
 
     def get_wiki_anchors(self, article_name):
-        selector = '#mw-content-text p a'
-        exclusion_selectors = ['.reference', '.rt-commentedText', 'a[href*="Pronunciation_respelling_key"]']
-        path = '{}/{}.html'.format(WIKIPEDIA_DATA_LOCATION, article_name)
-        return self.get_anchors(path, selector, exclude_selectors=exclusion_selectors)
+        path = self.get_wiki_path(article_name)
+        return self.get_anchors(path, WIKI_ANCHOR_SELECTOR, exclude_selectors=WIKI_EXCLUSION_SELECTORS)
 
     def get_wiki_text(self, article_name):
-        selector = '#mw-content-text p'
-        exclusion_selectors = ['.reference', '.rt-commentedText', 'a[href*="Pronunciation_respelling_key"]']
-        path = '{}/{}.html'.format(WIKIPEDIA_DATA_LOCATION, article_name)
+        path = self.get_wiki_path(article_name)
+        return self.normalize_text(self.get_text(path, WIKI_TEXT_SELECTOR, exclude_selectors=WIKI_EXCLUSION_SELECTORS))
+
+    def get_wiki_content(self, article_name):
+        """Returns the same text as get_wiki_text and the anchors found in it, parsing the article only once"""
+        return WikiContentExtractor().extract(self.get_wiki_path(article_name))
+
+    def get_wiki_paragraphs(self, article_name):
+        """Returns the paragraphs of the article, whose concatenation is the text returned by get_wiki_text"""
+        return WikiContentExtractor().extract_paragraphs(self.get_wiki_path(article_name))
+
+    @staticmethod
+    def merge_paragraphs(paragraphs, max_chars):
+        # Merges consecutive paragraphs into chunks of up to max_chars (unless a single paragraph is longer)
+        chunks = []
+        for paragraph in paragraphs:
+            if chunks and len(chunks[-1]) + len(paragraph) <= max_chars:
+                chunks[-1] += paragraph
+            else:
+                chunks.append(paragraph)
+        return chunks
+
+    @staticmethod
+    def get_wiki_path(article_name):
+        return '{}/{}.html'.format(WIKIPEDIA_DATA_LOCATION, article_name)
+
+    @staticmethod
+    def normalize_text(text):
         # Replace line breaks and non-breaking space by regular spaces
-        return self.get_text(path, selector, exclude_selectors=exclusion_selectors)\
-            .replace("\n", " ")\
-            .replace(u'\xa0', " ").strip()
+        return text.replace("\n", " ").replace(u'\xa0', " ").strip()
+
+
+class WikiContentExtractor(object):
+    """
+    Extracts the paragraph text and its anchors from a single parse of a Wikipedia article.
+    It uses lxml when available (considerably faster than html.parser) and BeautifulSoup otherwise.
+    Besides the attributes returned by Scrapper.get_anchors, each anchor contains its start and end offsets
+    in the returned text.
+    """
+
+    def __init__(self, use_lxml=True):
+        self.use_lxml = use_lxml and lxml is not None
+
+    def extract(self, path):
+        paragraphs = self.__get_paragraphs(path)
+        raw_text = ''
+        anchors = []
+        for paragraph_text, paragraph_anchors in paragraphs:
+            for text, href, parent_text, anchor_idx in paragraph_anchors:
+                if 'index.php' in href:
+                    continue
+                anchor = self.__get_anchor_data(text, href, parent_text)
+                anchor['start'] = len(raw_text) + anchor_idx
+                anchor['end'] = anchor['start'] + len(text)
+                anchors.append(anchor)
+            raw_text += paragraph_text
+
+        text = Scrapper.normalize_text(raw_text)
+        # Normalization only replaces single characters, so offsets are only shifted by the leading whitespaces
+        leading_whitespaces = len(raw_text) - len(raw_text.lstrip())
+        for anchor in anchors:
+            anchor['start'] -= leading_whitespaces
+            anchor['end'] -= leading_whitespaces
+        return text, anchors
+
+    def extract_paragraphs(self, path):
+        """Returns the (normalized) paragraphs of the article, whose concatenation is the text returned by extract"""
+        raw_paragraphs = [paragraph_text for paragraph_text, _ in self.__get_paragraphs(path)]
+        raw_text = ''.join(raw_paragraphs)
+        text = Scrapper.normalize_text(raw_text)
+        # Same shift as the anchors: offsets in the raw text minus the leading whitespaces
+        offset = -(len(raw_text) - len(raw_text.lstrip()))
+        paragraphs = []
+        for paragraph_text in raw_paragraphs:
+            start, end = max(0, offset), min(len(text), offset + len(paragraph_text))
+            offset += len(paragraph_text)
+            if end > start:
+                paragraphs.append(text[start:end])
+        return paragraphs
+
+    def __get_paragraphs(self, path):
+        with open(path, 'r', encoding="utf8") as f:
+            content = f.read()
+        return self.__get_lxml_paragraphs(content) if self.use_lxml else self.__get_soup_paragraphs(content)
+
+    @staticmethod
+    def __get_anchor_data(text, href, parent_text):
+        # Same surrounding text as in Scrapper.get_anchors
+        ele_text_idx = parent_text.index(text)
+        left_offset = min(ele_text_idx, ANCHOR_BASE_OFFSET)
+        right_offset = ANCHOR_BASE_OFFSET if ele_text_idx + len(text) + ANCHOR_BASE_OFFSET <= len(parent_text) \
+            else len(parent_text) - (len(text) + ele_text_idx)
+        surrounding_text = parent_text[ele_text_idx - left_offset:ele_text_idx + len(text) + right_offset]
+        return {'href': href, 'parent_text': parent_text, 'surrounding_text': surrounding_text,
+                'left_offset': left_offset, 'right_offset': right_offset, 'text': text}
+
+    @staticmethod
+    def __get_lxml_paragraphs(content):
+        root = lxml.html.fromstring(content.encode("utf8"), parser=lxml.html.HTMLParser(encoding="utf8"))
+        for element in EXCLUSION_XPATH(root):
+            element.drop_tree()
+        paragraphs = []
+        for paragraph in TEXT_XPATH(root):
+            anchors = []
+            WikiContentExtractor.__walk_lxml_element(paragraph, 0, anchors)
+            paragraphs.append((str(paragraph.text_content()), anchors))
+        return paragraphs
+
+    # Walks the element in document order, counting the characters of its text (as in text_content)
+    # to find the offset of each anchor within the paragraph
+    @staticmethod
+    def __walk_lxml_element(element, offset, anchors):
+        if not isinstance(element.tag, str):
+            return offset  # comments and processing instructions are not part of the text
+        if element.tag == 'a' and element.get('href') is not None:
+            anchors.append((str(element.text_content()), element.get('href'),
+                            str(element.getparent().text_content()), offset))
+        offset += len(element.text or '')
+        for child in element:
+            offset = WikiContentExtractor.__walk_lxml_element(child, offset, anchors)
+            offset += len(child.tail or '')
+        return offset
+
+    @staticmethod
+    def __get_soup_paragraphs(content):
+        soup = BeautifulSoup(content, 'html.parser')
+        for exclude in WIKI_EXCLUSION_SELECTORS:
+            for s in soup.select(exclude):
+                s.extract()
+        paragraphs = []
+        for paragraph in soup.select(WIKI_TEXT_SELECTOR):
+            # The same strings returned by get_text, with their offset within the paragraph
+            string_offsets = {}
+            paragraph_text = ''
+            for string in paragraph.strings:
+                string_offsets[id(string)] = len(paragraph_text)
+                paragraph_text += string
+            anchors = []
+            for ele in paragraph.select('a'):
+                if not ele.has_attr('href'):
+                    continue
+                first_string = next(iter(ele.strings), None)
+                anchor_idx = string_offsets.get(id(first_string)) if first_string is not None else None
+                if anchor_idx is None:
+                    anchor_idx = paragraph_text.find(ele.text)
+                anchors.append((ele.text, ele['href'], ele.parent.text, anchor_idx))
+            paragraphs.append((paragraph_text, anchors))
+        return paragraphs
+
+
+def load_wiki_text(article_name):
+    text, _ = Scrapper().get_wiki_content(article_name)
+    return text
+
+
+def load_wiki_chunks(article_name):
+    chunks = Scrapper.merge_paragraphs(Scrapper().get_wiki_paragraphs(article_name), int(config.get('CHUNK_MAX_CHARS')))
+    return ''.join(chunks), chunks
+
+
+class ArticleLoader(object):
+    """
+    Loads the text of Wikipedia articles ahead of time in a pool of workers.
+    Up to 'prefetch' articles are loaded (in order) while the caller consumes the previous ones,
+    so reading and cleaning the HTML overlaps with the spaCy processing.
+    Threads are used by default (lxml releases the GIL while parsing). Processes can be used instead,
+    which is preferable when lxml is not available.
+    When chunked, the context of each text also contains its paragraph chunks ('chunks').
+    """
+
+    def __init__(self, workers=None, prefetch=None, use_processes=False, chunked=False):
+        self.workers = workers if workers is not None else int(config.get('ARTICLE_LOADER_WORKERS'))
+        self.prefetch = prefetch if prefetch is not None else int(config.get('ARTICLE_LOADER_PREFETCH'))
+        self.use_processes = use_processes
+        self.load_function = load_wiki_chunks if chunked else load_wiki_text
+
+    def load(self, documents):
+        if self.workers < 1:
+            for document_name in documents:
+                yield self.__get_text_tuple(document_name, self.load_function(document_name))
+            return
+
+        executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=self.workers) as executor:
+            pending = collections.deque()
+            for document_name in documents:
+                pending.append((document_name, executor.submit(self.load_function, document_name)))
+                if len(pending) > self.prefetch:
+                    yield self.__get_result(pending)
+            while pending:
+                yield self.__get_result(pending)
+
+    def __get_result(self, pending):
+        document_name, future = pending.popleft()
+        return self.__get_text_tuple(document_name, future.result())
+
+    @staticmethod
+    def __get_text_tuple(document_name, result):
+        if isinstance(result, tuple):
+            text, chunks = result
+            return text, {'text_id': document_name, 'chunks': chunks}
+        return result, {'text_id': document_name}
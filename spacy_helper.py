@@ -1,13 +1,17 @@
+import collections
 import logging
 
+from batch_scheduler import BatchScheduler
+from spacy.tokens import Doc
+
 from constants import ConfigHandler, GENDER_MALE, GENDER_FEMALE
-from name_handler import NameHandler
+from name_handler import NameHandler, shared_name_handler
 from named_entity_recognition import PersonRecognition
 from person_entities import PersonGroup, PersonReference
 from person_resolution import PersonResolution
 from record_linkage import CrossDocumentLinkage, CoreRecordLinkage
 from relation_extraction import RelationExtraction
-from scrapper import Scrapper
+from scrapper import ArticleLoader
 from spacy_utils import SpacyUtils
 from utils import Utils
 
@@ -15,47 +19,107 @@ logger = logging.getLogger('logger')
 spacy_utils = SpacyUtils()
 utils = Utils()
 config = ConfigHandler()
-name_handler = NameHandler()
 
 NAMED_SPAN_PERSON = config.get('SPACY_NAMED_SPAN_PERSON')
+DISABLED_COMPONENTS = ["lemmatizer", "textcat"]
 
 
 class CrossDocumentResolution(object):
 
-    def __init__(self, nlp, exclusion_map=None):
+    def __init__(self, nlp, exclusion_map=None, doc_cache=None, streaming=False, chunked=False, gate=None,
+                 settings=None):
         self.nlp = nlp
         self.exclusion_map = exclusion_map
+        # Optional ConfigSnapshot used by this resolution, instead of the current configuration
+        self.settings = settings
+        self.name_handler = NameHandler(settings) if settings is not None else shared_name_handler
+        # Optional DocCache, so unchanged articles are not processed by spaCy again
+        self.doc_cache = doc_cache
+        # In streaming mode, each spaCy document is released right after its inner resolution,
+        # so memory does not grow with the (spaCy) documents of the corpus
+        self.streaming = streaming
+        # When chunked, each article is processed by spaCy in paragraph chunks (up to CHUNK_MAX_CHARS), which are
+        # joined back into a single document, so all offsets refer to the whole article
+        self.chunked = chunked or gate is not None
+        # Optional gate (see cascade.py) screening the chunks: only candidate chunks are processed by the
+        # transformer, the others are only tokenized
+        self.gate = gate
+        if doc_cache is not None:
+            doc_cache.check_settings(self.chunked, gate)
+        self.cascade_stats = {'candidates': 0, 'skipped': 0}
+        self.scheduler = BatchScheduler(nlp, disabled=DISABLED_COMPONENTS)
+        # The resolvers do not keep any state between documents, so they are only created again when the
+        # relation matcher rules change (eg. in a parameter sweep)
+        self.relation_extraction = None
+        self.relation_extraction_key = None
 
     def resolve(self, documents):
-        all_consolidated_persons = []
+        # Articles are loaded lazily (and ahead of time) while spaCy processes the previous ones
+        return self.resolve_texts(self.iter_texts(documents), len(documents))
+
+    def resolve_texts(self, texts, total=None):
+        """Resolves (text, {'text_id': ...}) tuples, such as articles that are not in the Wikipedia directory"""
+        if total is None and isinstance(texts, list):
+            total = len(texts)
+        logger.error("Starting spaCy's processing for %s documents", total)
+        doc_tuples = self.process_texts(texts)
+        resolutions = self.resolve_documents(doc_tuples, compact=self.streaming)
+        logger.error("Finished spaCy's processing for %s documents", total)
+        return self.link(resolutions)
+
+    # The methods below are the stages of the resolution. They are public so the stages can be executed
+    # (and their outputs reused) independently, such as in the parameter sweep.
+
+    def load_texts(self, documents):
+        return list(self.iter_texts(documents))
+
+    def iter_texts(self, documents):
+        return ArticleLoader(chunked=self.chunked).load(documents)
+
+    def process_texts(self, texts):
+        if self.doc_cache is None:
+            return self.__process(texts)
+        return self.__process_cached_texts(texts)
+
+    def get_settings(self):
+        return self.settings or config.get_snapshot()
+
+    def get_relation_extraction(self, settings):
+        if self.relation_extraction is None or self.relation_extraction_key != settings.relation_matcher_rules:
+            self.relation_extraction = RelationExtraction(settings)
+            self.relation_extraction_key = settings.relation_matcher_rules
+        return self.relation_extraction
+
+    def resolve_documents(self, doc_tuples, compact=False):
         resolutions = {}
-        scrapper = Scrapper()
-
-        texts = []
-        for document_name in documents:
-            text = scrapper.get_wiki_text(document_name).strip()
-            texts.append((text, {'text_id': document_name}))
-
-        logger.error("Starting spaCy's processing for %s documents", len(texts))
-        # doc_tuples = self.nlp.pipe(texts, as_tuples=True, disable=["lemmatizer", "textcat"], n_process=1, batch_size=100)
-        doc_tuples = self.nlp.pipe(texts, as_tuples=True, disable=["lemmatizer", "textcat"], n_process=4, batch_size=10)
-        logger.error("Finished spaCy's processing for %s documents", len(texts))
+        settings = self.get_settings()
+        relation_extraction = self.get_relation_extraction(settings)
         for doc, context in doc_tuples:
             text_id = context['text_id']
             logger.error("Starting inner resolution for %s", text_id)
-            inner = InnerDocumentResolution(text_id, doc, exclusion_map=self.exclusion_map)
+            inner = InnerDocumentResolution(text_id, doc, exclusion_map=self.exclusion_map,
+                                            relation_extraction=relation_extraction, settings=settings,
+                                            name_handler=self.name_handler)
             resolution = inner.resolve_names()
+            if compact:
+                # Nothing after this point requires the spaCy document
+                resolution.compact()
             logger.error("Finished inner resolution for %s", text_id)
             logger.debug("Total person groups in resolution: %s", len(resolution.groups))
             resolutions[str(resolution.unique_res_id)] = resolution
-            logger.error("Retrieving consolidated persons for %s", text_id)
+        logger.info("Name lookup cache: %s", self.name_handler.lookup_cache.get_stats())
+        logger.info("Name parse cache: %s", self.name_handler.parse_cache.get_stats())
+        return resolutions
+
+    def link(self, resolutions):
+        all_consolidated_persons = []
+        for resolution in resolutions.values():
             all_consolidated_persons.extend(resolution.get_consolidated_persons())
-            logger.error("Finished retrieving consolidated persons for %s", text_id)
 
         logger.debug("Total number of persons found in all documents: %s", len(all_consolidated_persons))
 
         logger.error("Started cross resolution")
-        linkage = CrossDocumentLinkage()
+        linkage = CrossDocumentLinkage(self.get_settings())
         groups = linkage.resolve(all_consolidated_persons)
         logger.error("Finished cross resolution")
         logger.debug("Across groups names resolved: %s", groups)
@@ -72,6 +136,97 @@ class CrossDocumentResolution(object):
         logger.error("Before returning final results")
         return groups_final
 
+    def __process(self, texts):
+        return self.__pipe_chunks(texts) if self.chunked else self.__pipe(texts)
+
+    def __pipe(self, texts):
+        return self.scheduler.pipe(texts)
+
+    def __pipe_chunks(self, texts):
+        # The chunks of an article are consecutive (the scheduler keeps the order), so the article is complete
+        # when its last chunk is processed. As in the cache, the pending queue keeps the skipped chunks in between.
+        pending = collections.deque()
+        chunk_docs = []
+        self.cascade_stats = {'candidates': 0, 'skipped': 0}  # counts of this run only
+
+        def candidate_chunks():
+            for text, context in texts:
+                chunks = context.get('chunks') or [text]
+                candidates = self.gate.screen(chunks) if self.gate else [True] * len(chunks)
+                for idx, (chunk, candidate) in enumerate(zip(chunks, candidates)):
+                    skipped_doc = None if candidate else self.__get_skipped_doc(chunk)
+                    pending.append((context, idx == len(chunks) - 1, skipped_doc))
+                    self.cascade_stats['candidates' if candidate else 'skipped'] += 1
+                    if candidate:
+                        yield chunk, context
+
+        def add_chunk(doc, context, is_last):
+            chunk_docs.append(doc)
+            if not is_last:
+                return []
+            document = Doc.from_docs(chunk_docs, ensure_whitespace=False)
+            chunk_docs.clear()
+            return [(document, context)]
+
+        def skipped_chunks():
+            documents = []
+            while pending and pending[0][2] is not None:
+                context, is_last, skipped_doc = pending.popleft()
+                documents += add_chunk(skipped_doc, context, is_last)
+            return documents
+
+        for doc, _ in self.__pipe(candidate_chunks()):
+            yield from skipped_chunks()
+            context, is_last, _ = pending.popleft()
+            yield from add_chunk(doc, context, is_last)
+        yield from skipped_chunks()
+        if self.gate:
+            logger.error("Chunks processed by the transformer: %s. Chunks skipped: %s",
+                         self.cascade_stats['candidates'], self.cascade_stats['skipped'])
+
+    def __get_skipped_doc(self, chunk):
+        # Tokenized only, as a single sentence, so it is not merged into the previous sentence.
+        # The sentence is set the same way as the pipeline does (dependency tree or sentence starts).
+        tokens = self.nlp.make_doc(chunk)
+        if not len(tokens):
+            return tokens
+        if not self.nlp.has_pipe("parser"):
+            return Doc(self.nlp.vocab, words=[token.text for token in tokens],
+                       spaces=[bool(token.whitespace_) for token in tokens],
+                       sent_starts=[True] + [False] * (len(tokens) - 1))
+        return Doc(self.nlp.vocab, words=[token.text for token in tokens],
+                   spaces=[bool(token.whitespace_) for token in tokens], heads=[0] * len(tokens),
+                   deps=["ROOT"] + ["dep"] * (len(tokens) - 1))
+
+    def __process_cached_texts(self, texts):
+        # Texts are consumed lazily: the ones missing from the cache are sent to spaCy (in order) and the pending
+        # queue keeps track of the cached ones in between, so the documents are returned in the original order
+        pending = collections.deque()
+        stats = {'cached': 0, 'processed': 0}
+
+        def missing_texts():
+            for text, context in texts:
+                cached = self.doc_cache.contains(context['text_id'], text)
+                pending.append((text, context, cached))
+                if not cached:
+                    yield text, context
+
+        for doc, context in self.__process(missing_texts()):
+            yield from self.__load_cached_docs(pending, stats)
+            text, _, _ = pending.popleft()
+            self.doc_cache.put(context['text_id'], text, doc)
+            stats['processed'] += 1
+            yield doc, context
+        yield from self.__load_cached_docs(pending, stats)
+        self.doc_cache.save()
+        logger.error("Documents found in cache: %s. Documents processed: %s", stats['cached'], stats['processed'])
+
+    def __load_cached_docs(self, pending, stats):
+        while pending and pending[0][2]:
+            text, context, _ = pending.popleft()
+            stats['cached'] += 1
+            yield self.doc_cache.get(context['text_id'], text), context
+
     # We iterate over all pairs and add them into the same group
     # (merging people from different docs into the same group)
     def __merge_groups(self, groups, resolutions, group_tracking):
@@ -140,11 +295,16 @@ class CrossDocumentResolution(object):
 
 class InnerDocumentResolution(object):
 
-    def __init__(self, document_id, document, exclusion_map=None):
+    def __init__(self, document_id, document, exclusion_map=None, relation_extraction=None, settings=None,
+                 name_handler=None):
         self.document_id = document_id  # document identifier, eg. Craig_Robinson_(basketball)
         self.document = document
         self.exclusion_map = exclusion_map
-        recognition = PersonRecognition(document_id=document_id, exclusion_map=self.exclusion_map)
+        self.settings = settings or config.get_snapshot()  # ConfigSnapshot
+        self.relation_extraction = relation_extraction or RelationExtraction(self.settings)
+        self.name_handler = name_handler or shared_name_handler
+        recognition = PersonRecognition(document_id=document_id, exclusion_map=self.exclusion_map,
+                                        settings=self.settings)
         person_spans = recognition.get_person_spans(document)
         spacy_utils.initialize_person_entities(document, person_spans)
 
@@ -152,39 +312,21 @@ class InnerDocumentResolution(object):
         return self.document.spans[NAMED_SPAN_PERSON]
 
     def get_person_references(self):
-        references = []
-        relation_extraction = RelationExtraction()
-        span_relationships = relation_extraction.extract(self.get_person_spans())
-        known_names_map = {'first_names': set(), 'last_names': set(), 'nicknames': set()}
-
-        for span in span_relationships:
-            attrs = span_relationships[span]
+        span_relationships = self.relation_extraction.extract(self.get_person_spans())
+        for attrs in span_relationships.values():
             attrs['document_id'] = self.document_id
-            logger.debug("Before creating person with attributes: %s", attrs)
-            person_data = name_handler.to_person({span: attrs}, known_names_map=known_names_map)
-            person = PersonReference(**person_data)
-            references.append(person)
-            if person.last_name:
-                known_names_map['last_names'].add(person.last_name.lower())
-            if person.first_name:
-                known_names_map['first_names'].add(person.first_name.lower())
-            if person.nickname:
-                if isinstance(person.nickname, list):
-                    print("Person nickname is list!!!!: ", person.nickname)
-                    continue
-                known_names_map['nicknames'].add(person.nickname.lower())
-
-        return references
+        # All the mentions of the document are parsed at once, reusing the parse of repeated names
+        return [PersonReference(**person_data) for person_data in self.name_handler.to_persons(span_relationships)]
 
     def resolve_core(self, references):
-        core = CoreRecordLinkage()
+        core = CoreRecordLinkage(self.settings)
         person_refs = [s.to_dict() for s in references if s and not s.is_pronoun()]
         core_groups = []
         if len(person_refs) > 1:
             core_groups = core.resolve(person_refs)
         person_map = {p.get_identification(): p for p in references if p and not p.is_pronoun()}
         group_id = 1
-        resolution = PersonResolution(references)
+        resolution = PersonResolution(references, self.settings)
         for group in core_groups:
             pg = PersonGroup(group_id)
             for person in group:
@@ -225,26 +367,23 @@ class InnerDocumentResolution(object):
         self.__sort_groups(resolution)
         return resolution
 
-    def __string_to_offset(self, string):
-        parts = string.split(":")
-        return int(parts[0][1:]), int(parts[1][:-1])
-
     def __map_relationships(self, resolution):
+        offset_index = resolution.get_offset_index()
         for group in resolution:
             for person in group:
                 rels = person.rel
-                # [420:428],brother_of,[476:490]
+                # Relation records, eg. [420:428],sibling_of,[476:490]
                 if rels:
                     logger.debug("Mapping relationship for %s: %s", person, rels)
                     if isinstance(rels, list):
                         mapped_rels = []
                         for rel in rels:
-                            result = self.__map_relationship(group, person, rel, resolution)
+                            result = self.__map_relationship(group, person, rel, offset_index)
                             if result and self.__is_relationship_plausible(result):
                                 mapped_rels.append(result)
                         person.mapped_rel = mapped_rels
                     else:
-                        person.mapped_rel = [self.__map_relationship(group, person, rels, resolution)]
+                        person.mapped_rel = [self.__map_relationship(group, person, rels, offset_index)]
                     # Remove Nones
                     person.mapped_rel = [i for i in person.mapped_rel if i]
 
@@ -252,15 +391,12 @@ class InnerDocumentResolution(object):
         # TODO: Not implemented yet
         return True
 
-    def __map_relationship(self, group, person, rels, resolution):
-        parts = rels.split(",")
-        start, end = self.__string_to_offset(parts[0])
-        left_group = resolution.find_group_by_offset(start, end)
-        start, end = self.__string_to_offset(parts[2])
-        right_group = resolution.find_group_by_offset(start, end)
+    def __map_relationship(self, group, person, rels, offset_index):
+        left_group = offset_index.get(rels.get_subject_offset())
+        right_group = offset_index.get(rels.get_object_offset())
         # subject must be the same as left and right cannot be the same!
         if left_group == group and right_group != group:
-            return {'subject': left_group, 'predicate': parts[1], 'object': right_group}
+            return {'subject': left_group, 'predicate': rels.predicate.value, 'object': right_group}
         else:
             logger.debug("Cannot have a relationship with itself, removing it! Person: %s, Relationships: %s", person,
                          rels)
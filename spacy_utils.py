@@ -1,6 +1,8 @@
 import logging
+import numpy as np
 import spacy
-from spacy.tokens import Token
+from spacy.attrs import ORTH, ENT_TYPE, IDX
+from spacy.tokens import Doc, Token
 from constants import ConfigHandler
 
 logger = logging.getLogger('logger')
@@ -8,6 +10,59 @@ config = ConfigHandler()
 NAMED_SPAN_PERSON = config.get('SPACY_NAMED_SPAN_PERSON')
 
 
+class PersonMentionIndex(object):
+    """
+    Sentences and person mentions of a document, built once after the person entities are initialized.
+    Each token is mapped to its sentence, and each sentence to the person spans with a token in it (sorted by start),
+    so the persons around a mention are found without walking the tokens of its sentence.
+    It also keeps array views of the tokens (text and entity type hashes, person span ids), so SpacyUtils.find_elements
+    compares a range of tokens at once, and the token of each character of the text (with its trailing whitespace).
+    """
+
+    def __init__(self, document, names_token_index):
+        self.orth = document.to_array(ORTH)
+        self.ent_types = document.to_array(ENT_TYPE)
+        self.person_ids = np.full(len(document), -1, dtype=np.int32)  # position of the person span of each token
+        person_spans = {}
+        for i, span in names_token_index.items():
+            self.person_ids[i] = person_spans.setdefault(id(span), len(person_spans))
+        self.is_person_part = self.person_ids >= 0
+        token_starts = document.to_array(IDX).astype(np.int64)
+        self.char_tokens = np.repeat(np.arange(len(document), dtype=np.int32),
+                                     np.diff(token_starts, append=len(document.text)))
+        self.sentences = list(document.sents)
+        self.token_sentence = [0] * len(document)
+        self.sentence_persons = []
+        self.positions = {}  # (sentence id, start, end) -> position of the person span in its sentence
+        for sentence_id, sentence in enumerate(self.sentences):
+            persons = []
+            seen = set()
+            for i in range(sentence.start, sentence.end):
+                self.token_sentence[i] = sentence_id
+                span = names_token_index.get(i)
+                if span is not None and id(span) not in seen:
+                    seen.add(id(span))
+                    persons.append(span)
+            persons.sort(key=lambda k: k.start)
+            for position, span in enumerate(persons):
+                self.positions[(sentence_id, span.start, span.end)] = position
+            self.sentence_persons.append(persons)
+
+    def get_window(self, span):
+        """Returns the sentence of the span (as span.sent), its person spans sorted by start and the span position"""
+        sentence_id = self.token_sentence[span.start]
+        if sentence_id != self.token_sentence[span.end - 1]:
+            # Spans across sentences are rare, their (merged) sentence is computed by spaCy
+            sentence = span.sent
+            persons = sorted(set(filter(None, [token._.get_person for token in sentence])), key=lambda k: k.start)
+            return sentence, persons, persons.index(span)
+        persons = self.sentence_persons[sentence_id]
+        position = self.positions.get((sentence_id, span.start, span.end))
+        if position is None:
+            position = persons.index(span)  # ValueError, as the span is not a person of the sentence
+        return self.sentences[sentence_id], persons, position
+
+
 class SpacyUtils(object):
 
     def get_next_token(self, entry):
@@ -57,6 +112,10 @@ class SpacyUtils(object):
             return found[0]
 
     def find_elements(self, span=None, start_at=None, mode=None, attr_key=None, attr_val=None, max_tokens=5, ext=False, exclude_ent_types=[]):
+        values = self.__get_attr_values(span.doc, attr_key, attr_val, ext)
+        if values is not None:
+            return self.__find_indexed_elements(span, start_at, mode, values, attr_val, max_tokens, exclude_ent_types)
+
         found = []
         if mode == "forward" or mode == "both":
             span_after = span.doc[start_at:span.end]
@@ -77,6 +136,40 @@ class SpacyUtils(object):
                     found.append(token)
         return found
 
+    def __get_attr_values(self, document, attr_key, attr_val, ext):
+        # Array of the attribute values, for the attributes kept by the person index of the document
+        index = document._.person_index if Doc.has_extension("person_index") else None
+        if index is None:
+            return None
+        if ext and attr_key == 'is_person_part':
+            return index.is_person_part
+        if not ext and attr_key == 'text' and isinstance(attr_val, str):
+            return index.orth
+        return None
+
+    def __find_indexed_elements(self, span, start_at, mode, values, attr_val, max_tokens, exclude_ent_types):
+        # Same tokens (and order) as the loops in find_elements
+        document = span.doc
+        index = document._.person_index
+        strings = document.vocab.strings
+        value = strings[attr_val] if isinstance(attr_val, str) else attr_val
+        ranges = []
+        if mode == "forward" or mode == "both":
+            ranges.append((start_at, min(span.end, start_at + max_tokens + 1)))
+        if mode == "backward" or mode == "both":
+            ranges.append((max(span.start, start_at - max_tokens), start_at))
+
+        found = []
+        for start, end in ranges:
+            if start >= end:
+                continue
+            matches = values[start:end] == value
+            if exclude_ent_types:
+                excluded = [strings[ent_type] for ent_type in exclude_ent_types]
+                matches &= ~np.isin(index.ent_types[start:end], excluded)
+            found.extend(document[int(i)] for i in np.flatnonzero(matches) + start)
+        return found
+
     def get_attr(self, token=None, attr_name=None, ext=False):
         if ext:
             return getattr(getattr(token, '_'), attr_name)
@@ -93,3 +186,17 @@ class SpacyUtils(object):
         Token.set_extension("get_person", getter=lambda token: names_token_index[token.i] if token.i in names_token_index else None, force=True)
         Token.set_extension("is_person_part", getter=lambda token: token.i in names_token_index, force=True)
         document.spans[NAMED_SPAN_PERSON] = person_name_spans
+        if not Doc.has_extension("person_index"):
+            Doc.set_extension("person_index", default=None)
+        document._.person_index = PersonMentionIndex(document, names_token_index)
+
+    def get_token_at(self, document, char):
+        """Token of the document at a character offset, or None when the document has no person index"""
+        index = document._.person_index if Doc.has_extension("person_index") else None
+        if index is None or not 0 <= char < len(index.char_tokens):
+            return None
+        return document[int(index.char_tokens[char])]
+
+    def get_person_index(self, document):
+        """The PersonMentionIndex of a document whose person entities were initialized"""
+        return document._.person_index
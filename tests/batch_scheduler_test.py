@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+import spacy
+
+from batch_scheduler import BatchScheduler, LookaheadBatches
+
+SHORT_TEXT = "Barack Obama married Michelle Robinson in 1992."
+LONG_TEXT = " ".join([SHORT_TEXT] * 100)
+
+
+class BatchSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.nlp = spacy.blank("en")
+        self.texts = [(LONG_TEXT if i % 3 == 0 else SHORT_TEXT + str(i), {'text_id': i}) for i in range(10)]
+
+    def test_order_is_preserved(self):
+        scheduler = BatchScheduler(self.nlp, token_budget=1024, max_processes=1, lookahead=4)
+        results = list(scheduler.pipe(self.texts))
+        self.assertEqual([context['text_id'] for _, context in self.texts],
+                         [context['text_id'] for _, context in results])
+        self.assertEqual([text for text, _ in self.texts], [doc.text for doc, _ in results])
+
+    def test_order_is_preserved_with_processes(self):
+        scheduler = BatchScheduler(self.nlp, token_budget=1024, max_processes=1, lookahead=4)
+        scheduler.n_process = 2  # a pool of workers, whatever the cores of the machine
+        results = list(scheduler.pipe(self.texts))
+        self.assertEqual([text for text, _ in self.texts], [doc.text for doc, _ in results])
+
+    def test_batches_within_lookahead(self):
+        scheduler = BatchScheduler(self.nlp, token_budget=4096, max_processes=1, lookahead=4)
+        batches = list(LookaheadBatches(scheduler, self.texts))
+        # The batch of the oldest text goes first, with the texts of its bucket in the look-ahead
+        # (up to 2 long texts or 32 short texts per batch), and nothing is added to complete a batch
+        self.assertEqual([[0, 3], [1, 2, 4, 5], [6, 9], [7, 8]], [[item[0] for item in batch] for batch in batches])
+
+    def test_batch_sizes_follow_buckets(self):
+        scheduler = BatchScheduler(self.nlp, token_budget=4096, max_processes=1, lookahead=4)
+        with mock.patch.object(self.nlp, 'pipe', wraps=self.nlp.pipe) as pipe:
+            list(scheduler.pipe(self.texts))
+        # Each batch is a single nlp.pipe batch of its own size, without empty texts
+        self.assertEqual([(2, 2), (4, 4), (2, 2), (2, 2)],
+                         [(len(call.args[0]), call.kwargs['batch_size']) for call in pipe.call_args_list])
+
+    def test_max_processes(self):
+        self.assertEqual(1, BatchScheduler.get_max_processes(4, 10 ** 9))
+        self.assertLessEqual(BatchScheduler.get_max_processes(4, 1), 4)
+        self.assertIsNotNone(BatchScheduler.get_available_memory_mb())
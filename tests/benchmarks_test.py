@@ -0,0 +1,246 @@
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+import dataclasses
+
+import spacy
+
+from constants import *
+from name_handler import NameHandler
+from regex_handler import RegexHandler
+from relation_extraction import DateExtractor, RelationExtraction, RELATION_TOKEN_PATTERNS
+from scrapper import Scrapper
+from spacy_utils import SpacyUtils
+from tests.test_constants import TRAINING_SET
+
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Import time allowed for the project modules, on top of their third party dependencies
+IMPORT_TIME_BUDGET = 0.5
+IMPORT_TIME_RUNS = 3
+# Names of tests/name_handler_test.py, with the text before the name (when any) and how many times they are repeated
+TITLE_NAMES = ['Lucretia "Loulie" (Wear) Walker', 'Mary (née Isham) Randolph', 'Abigail (Smith) Adams',
+               'Ellen Bray (née Wrenshall) Dent', 'Marytje (or Maria) Van Alen', 'Barbara Jean (née Thompson',
+               'Coolidge Senior', 'Theodore "T. R." Roosevelt Jr.', 'Isaac Allerton Jr., Esq', 'née Walker',
+               'Mrs. Abigail Adams', 'General George Washington', 'Queen|Elizabeth II', 'Captain|John Smith, Esq']
+TITLE_REPETITIONS = 2000
+# Words after each capitalized word (as the text after a person) searched for dates
+DATE_WINDOW_WORDS = 10
+# Sentences both relationship backends must resolve, with the persons between bars, the relationship of the first
+# person to the second one and the rule that extracts it
+RELATION_SENTENCES = [("|John Adams| married |Abigail Smith| in 1764 at Weymouth.", 'spouse_of', 'marry'),
+                      ("|Ulysses Grant| married |Julia Dent| in 1848.", 'spouse_of', 'marry'),
+                      ("|Tom| remarried |Ann| after the war.", 'spouse_of', 'marry'),
+                      ("|Ann| is the sister of |Jack Johnson|, who lived in Boston.", 'sibling_of', 'relatives')]
+# Disagreements between the relationship backends printed as examples
+RELATION_EXAMPLES = 10
+ANNOTATED_ARTICLES = BASE_DIRECTORY + "annotated_wikipedia_articles.jsonl"
+
+
+def get_annotated_articles(articles=TRAINING_SET):
+    """Annotated articles (as in validation.py) of the given names, in the order of the file"""
+    if not os.path.exists(ANNOTATED_ARTICLES):
+        return []
+    articles = set(articles)
+    with open(ANNOTATED_ARTICLES, 'r', encoding="UTF-8") as file:
+        data = [json.loads(line) for line in file]
+    return [article for article in data if article['src'] in articles]
+
+
+def get_relation_backends():
+    settings = ConfigHandler().get_snapshot()
+    return [('Relationship regexes', RelationExtraction(dataclasses.replace(settings, relation_matcher_rules=()))),
+            ('Relationship token patterns', RelationExtraction(dataclasses.replace(
+                settings, relation_matcher_rules=tuple(RELATION_TOKEN_PATTERNS))))]
+
+
+class BenchmarksTest(unittest.TestCase):
+    """
+    Throughput comparisons between alternative implementations of the same stage.
+    These print their timings and check that both implementations return the same results, except for the
+    relationship backends, whose differences on the annotated articles are reported instead.
+    """
+
+    def test_scrapper_single_parse(self):
+        scrapper = Scrapper()
+        articles = [name[:-len(".html")] for name in sorted(os.listdir(WIKIPEDIA_DATA_LOCATION)) if name.endswith(".html")]
+
+        start = time.perf_counter()
+        expected = [(scrapper.get_wiki_text(article), scrapper.get_wiki_anchors(article)) for article in articles]
+        two_parses_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = [scrapper.get_wiki_content(article) for article in articles]
+        single_parse_time = time.perf_counter() - start
+
+        for article, (text, anchors), (result_text, result_anchors) in zip(articles, expected, results):
+            self.assertEqual(text, result_text, article)
+            self.assertEqual(len(anchors), len(result_anchors), article)
+
+        print("Articles: ", len(articles))
+        print("BeautifulSoup text and anchors (2 parses): {:.2f}s".format(two_parses_time))
+        print("Single parse text and anchors: {:.2f}s".format(single_parse_time))
+
+    def test_title_lexicon(self):
+        nlp = spacy.blank("en")
+        handler = NameHandler()
+        lexicon = handler.get_title_lexicon()
+        names = []
+        for name in TITLE_NAMES:
+            prefix, _, name = name.rpartition("|")
+            doc = nlp(" ".join([prefix, name]).strip())
+            names.append((name.split(), doc[len(nlp(prefix)) if prefix else 0:]))
+        names = names * TITLE_REPETITIONS
+
+        start = time.perf_counter()
+        expected = [{PERSON_GEN_TITLE: handler.look_for_generational_title(parts),
+                     PERSON_COURTESY_TITLE: handler.look_for_courtesy_title(parts, span),
+                     PERSON_ROYAL_TITLE: handler.look_for_royal_title(parts, span),
+                     PERSON_ARMY_TITLE: handler.look_for_army_title(parts, span),
+                     PERSON_OTHER_TITLE: handler.look_for_other_title(parts, span)} for parts, span in names]
+        searches_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = [lexicon.search(parts, span) for parts, span in names]
+        lexicon_time = time.perf_counter() - start
+
+        for (parts, _), titles, result in zip(names, expected, results):
+            self.assertEqual({category: title for category, title in titles.items() if title}, result, parts)
+
+        print("Names: ", len(names))
+        print("Title searches per category: {:.2f}s".format(searches_time))
+        print("Title lexicon: {:.2f}s".format(lexicon_time))
+
+    def test_date_extractor(self):
+        windows = []
+        for data in get_annotated_articles():
+            words = data['text'].split()
+            windows.extend(" ".join(words[idx + 1:idx + 1 + DATE_WINDOW_WORDS])
+                           for idx, word in enumerate(words) if word[0].isupper())
+        if not windows:
+            self.skipTest("No annotated articles in " + ANNOTATED_ARTICLES)
+
+        extractor = DateExtractor()
+        handler = RegexHandler()
+        handler.rules = extractor.rules
+
+        start = time.perf_counter()
+        expected = [handler.execute(window) for window in windows]
+        rules_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = [extractor.execute(window) for window in windows]
+        extractor_time = time.perf_counter() - start
+
+        for window, dates, result in zip(windows, expected, results):
+            self.assertEqual(dates, result, window)
+
+        print("Windows: ", len(windows))
+        print("Date rules: {:.2f}s".format(rules_time))
+        print("Date extractor: {:.2f}s".format(extractor_time))
+
+    def test_relation_matcher_sentences(self):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        utils = SpacyUtils()
+        for name, extraction in get_relation_backends():
+            for sentence, predicate, rule in RELATION_SENTENCES:
+                parts = sentence.split("|")
+                offsets = []
+                text = ''
+                for idx, part in enumerate(parts):
+                    if idx % 2:
+                        offsets.append((len(text), len(text) + len(part)))
+                    text += part
+                doc = nlp(text)
+                spans = [doc.char_span(start, end) for start, end in offsets]
+                utils.initialize_person_entities(doc, spans)
+                relations = extraction.extract(spans)[spans[0]].get('rel', [])
+                expected = (offsets[0], predicate, offsets[1], rule)
+                self.assertIn(expected, [(rel.get_subject_offset(), rel.predicate.value, rel.get_object_offset(),
+                                          rel.source) for rel in relations], (name, text))
+
+    def test_relation_matcher(self):
+        articles = get_annotated_articles()
+        if not articles:
+            self.skipTest("No annotated articles in " + ANNOTATED_ARTICLES)
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        utils = SpacyUtils()
+        documents = []
+        for data in articles:
+            doc = nlp(data['text'].strip())
+            # The annotated mentions (as in validation.py) are the person spans, with the entity they refer to
+            entities = {}
+            for start, end, entity in data['label']:
+                span = doc.char_span(start, end, alignment_mode="expand")
+                if span is not None and not any(marker in entity for marker in ["GROUP", "Group", "TEMPORARY"]):
+                    entities[span] = entity
+            spans = spacy.util.filter_spans(entities)
+            documents.append((data['src'], doc, spans, {(span.start_char, span.end_char): entities[span]
+                                                        for span in spans}))
+
+        results = []
+        for name, extraction in get_relation_backends():
+            elapsed = 0
+            relations = []
+            for _, doc, spans, entities in documents:
+                # The person entities are set for each document, as the extensions only refer to the last one
+                utils.initialize_person_entities(doc, spans)
+                start = time.perf_counter()
+                extracted = extraction.extract(spans)
+                elapsed += time.perf_counter() - start
+                relations.append([extracted[span].get('rel', []) for span in spans])
+            results.append(relations)
+            # The annotations have no relationships, but one between two mentions of the same person is wrong
+            found = distinct = 0
+            for (_, _, _, entities), document_rels in zip(documents, relations):
+                for rel in itertools.chain.from_iterable(document_rels):
+                    found += 1
+                    if entities[rel.get_subject_offset()] != entities[rel.get_object_offset()]:
+                        distinct += 1
+            print("{0}: {1:.2f}s".format(name, elapsed))
+            print("{0}: {1} relationships, {2} between different annotated persons ({3:.1%})".format(
+                name, found, distinct, distinct / max(1, found)))
+            self.assertGreater(distinct, 0, name)
+
+        disagreements = []
+        for (article, _, spans, _), regex_rels, token_rels in zip(documents, *results):
+            for span, regex_span_rels, token_span_rels in zip(spans, regex_rels, token_rels):
+                if [str(rel) for rel in regex_span_rels] != [str(rel) for rel in token_span_rels]:
+                    disagreements.append((article, span, regex_span_rels, token_span_rels))
+        print("Articles: ", len(documents))
+        print("Mentions with different relationships: {0} of {1}".format(
+            len(disagreements), sum(len(spans) for _, _, spans, _ in documents)))
+        for article, span, regex_span_rels, token_span_rels in disagreements[:RELATION_EXAMPLES]:
+            print("{0} [{1}]: {2}".format(article, span, span.sent.text.strip()))
+            print("    regexes: {0}".format([(str(rel), rel.source) for rel in regex_span_rels]))
+            print("    token patterns: {0}".format([(str(rel), rel.source) for rel in token_span_rels]))
+
+    def test_import_time_budget(self):
+        dependencies_time = self.__get_import_time("spacy, recordlinkage, pandas, bs4, unidecode")
+        import_time = self.__get_import_time("spacy_helper")
+        print("Dependencies import time: {:.2f}s".format(dependencies_time))
+        print("spacy_helper import time: {:.2f}s".format(import_time))
+        self.assertLess(import_time - dependencies_time, IMPORT_TIME_BUDGET)
+
+    def test_import_is_lazy(self):
+        code = "import spacy_helper, name_handler, utils; print(utils.is_initialized(name_handler.shared_name_handler))"
+        output = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIRECTORY, capture_output=True, text=True,
+                                check=True).stdout
+        self.assertEqual("False", output.strip())
+
+    @staticmethod
+    def __get_import_time(modules):
+        # Best of a few runs, in new interpreters (so nothing is imported yet)
+        code = "import time; start = time.perf_counter(); import {0}; print(time.perf_counter() - start)".format(modules)
+        times = []
+        for _ in range(IMPORT_TIME_RUNS):
+            output = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIRECTORY, capture_output=True, text=True,
+                                    check=True).stdout
+            times.append(float(output.strip().splitlines()[-1]))
+        return min(times)
@@ -0,0 +1,21 @@
+import unittest
+
+from cascade import GazetteerGate
+from name_handler import FirstNameEntry
+
+NAMES = {'michelle': FirstNameEntry(100, 0.01, 100, 0, 1, 0), 'may': FirstNameEntry(10, 0.001, 10, 0, 1, 0)}
+
+
+class GazetteerGateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.gate = GazetteerGate(names=NAMES)
+
+    def test_first_names_and_pronouns(self):
+        self.assertEqual([True, True, False],
+                         self.gate.screen(["Michelle Obama is an attorney.", "She was born in Chicago.",
+                                           "Chicago is a city in Illinois."]))
+
+    def test_lowercase_words_are_not_names(self):
+        self.assertFalse(self.gate.is_candidate("The results may vary."))
+        self.assertTrue(self.gate.is_candidate("May Robinson lived in Chicago."))
@@ -0,0 +1,56 @@
+import dataclasses
+import unittest
+
+from constants import ConfigHandler, ConfigSnapshot
+from tests.test_constants import TemporaryParameters
+
+config = ConfigHandler()
+
+
+class FakeConfig(object):
+
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, key):
+        return self.values[key] if key in self.values else config.get(key)
+
+
+class ConfigSnapshotTest(unittest.TestCase):
+
+    def test_values_are_typed(self):
+        snapshot = ConfigSnapshot.from_config(FakeConfig({'GROUP_SIMILARITY_THRESHOLD': '0.75',
+                                                          'FUZZY_NAME_LOOKUP': 'True',
+                                                          'PERSON_RECOGNITION_FORWARD_TOKENS': '3',
+                                                          'ARMY_TITLES': "['general', 'major']"}))
+        self.assertEqual(0.75, snapshot.group_similarity_threshold)
+        self.assertIs(True, snapshot.fuzzy_name_lookup)
+        self.assertEqual(3, snapshot.person_recognition_forward_tokens)
+        self.assertEqual(('general', 'major'), snapshot.army_titles)
+
+    def test_invalid_value(self):
+        for key, value in [('GROUP_SIMILARITY_THRESHOLD', 'high'), ('FUZZY_NAME_LOOKUP', 'yes'),
+                           ('ARMY_TITLES', "general"), ('PERSON_RECOGNITION_FORWARD_TOKENS', '2.5')]:
+            with self.assertRaises(ValueError):
+                ConfigSnapshot.from_config(FakeConfig({key: value}))
+
+    def test_snapshot_is_immutable(self):
+        snapshot = config.get_snapshot()
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            snapshot.group_similarity_threshold = 0.0
+        changed = dataclasses.replace(snapshot, group_similarity_threshold=0.0)
+        self.assertEqual(0.0, changed.group_similarity_threshold)
+        self.assertIs(snapshot, config.get_snapshot())
+
+    def test_snapshot_follows_configuration_changes(self):
+        original_value = config.get('GROUP_SIMILARITY_THRESHOLD')
+        with TemporaryParameters() as location:
+            config.set_values({'GROUP_SIMILARITY_THRESHOLD': 0.42})
+            self.assertEqual(0.42, config.get_snapshot().group_similarity_threshold)
+            with open(location, 'r') as f:
+                self.assertIn("group_similarity_threshold = 0.42", f.read())
+        self.assertEqual(float(original_value), config.get_snapshot().group_similarity_threshold)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import tempfile
+import unittest
+
+import spacy
+
+from cascade import GazetteerGate
+from doc_cache import DocCache
+from name_handler import FirstNameEntry
+
+TEXT = "Michelle LaVaughn Robinson Obama is an American attorney and author."
+
+
+class DocCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.nlp = spacy.blank("en")
+        self.location = tempfile.mkdtemp()
+
+    def test_cache_hit(self):
+        cache = DocCache(self.nlp, disabled=["lemmatizer"], location=self.location)
+        self.assertIsNone(cache.get("Michelle_Obama", TEXT))
+        cache.put("Michelle_Obama", TEXT, self.nlp(TEXT))
+        doc = cache.get("Michelle_Obama", TEXT)
+        self.assertEqual(TEXT, doc.text)
+        self.assertEqual(TEXT, cache.load("Michelle_Obama").text)
+
+    def test_cache_miss_on_changed_text(self):
+        cache = DocCache(self.nlp, location=self.location)
+        cache.put("Michelle_Obama", TEXT, self.nlp(TEXT))
+        self.assertIsNone(cache.get("Michelle_Obama", TEXT + " She was born in 1964."))
+
+    def test_cache_miss_on_changed_pipeline(self):
+        self.nlp.add_pipe("sentencizer")
+        cache = DocCache(self.nlp, disabled=["lemmatizer"], location=self.location)
+        cache.put("Michelle_Obama", TEXT, self.nlp(TEXT))
+        cache.save()
+        # Disabling components missing from the pipeline does not change the documents
+        same_cache = DocCache(self.nlp, disabled=["lemmatizer", "textcat"], location=self.location)
+        self.assertIsNotNone(same_cache.get("Michelle_Obama", TEXT))
+        other_cache = DocCache(self.nlp, disabled=["sentencizer"], location=self.location)
+        self.assertIsNone(other_cache.get("Michelle_Obama", TEXT))
+        self.nlp.disable_pipe("sentencizer")
+        self.assertIsNone(DocCache(self.nlp, location=self.location).get("Michelle_Obama", TEXT))
+
+    def test_cache_miss_on_changed_chunks(self):
+        cache = DocCache(self.nlp, location=self.location, chunked=True, chunk_max_chars=2000)
+        cache.put("Michelle_Obama", TEXT, self.nlp(TEXT))
+        cache.save()
+        self.assertIsNotNone(DocCache(self.nlp, location=self.location, chunked=True, chunk_max_chars=2000)
+                             .get("Michelle_Obama", TEXT))
+        self.assertIsNone(DocCache(self.nlp, location=self.location, chunked=True, chunk_max_chars=1000)
+                          .get("Michelle_Obama", TEXT))
+        names = {'michelle': FirstNameEntry(100, 0.01, 100, 0, 1, 0)}
+        gated_cache = DocCache(self.nlp, location=self.location, gate=GazetteerGate(names, threshold=0.001),
+                               chunk_max_chars=2000)
+        gated_cache.put("Michelle_Obama", TEXT, self.nlp(TEXT))
+        gated_cache.save()
+        self.assertIsNone(DocCache(self.nlp, location=self.location, gate=GazetteerGate(names, threshold=0.002),
+                                   chunk_max_chars=2000).get("Michelle_Obama", TEXT))
+
+    def test_settings_mismatch(self):
+        cache = DocCache(self.nlp, location=self.location, chunked=True)
+        cache.check_settings(True, None)
+        with self.assertRaises(ValueError):
+            cache.check_settings(False, None)
+        with self.assertRaises(ValueError):
+            DocCache(self.nlp, location=self.location).check_settings(True, None)
+        names = {'michelle': FirstNameEntry(100, 0.01, 100, 0, 1, 0)}
+        with self.assertRaises(ValueError):
+            DocCache(self.nlp, location=self.location, gate=GazetteerGate(names, threshold=0.001)).check_settings(
+                True, GazetteerGate(names, threshold=0.002))
+
+    def test_index_is_persisted(self):
+        cache = DocCache(self.nlp, location=self.location)
+        cache.put("Michelle_Obama", TEXT, self.nlp(TEXT))
+        cache.save()
+        reloaded = DocCache(self.nlp, location=self.location)
+        self.assertEqual(TEXT, reloaded.get("Michelle_Obama", TEXT).text)
@@ -0,0 +1,72 @@
+import dataclasses
+import unittest
+
+import spacy
+
+from constants import ConfigHandler
+from matcher_handler import MatcherHandler
+from regex_constants import REGEX_PERSON_RELATIVES
+from regex_handler import RegexHandler
+from relation_extraction import RelationExtraction, RelationshipNormalizer, PersonMaskerizer, Predicate, \
+    RELATION_TOKEN_PATTERNS
+from spacy_utils import SpacyUtils
+
+
+class MatcherHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        self.doc = nlp("Julia Dent, the great-granddaughter of John Smith, married Ulysses Grant in 1848.")
+        self.spans = [self.doc[0:2], self.doc[8:10], self.doc[12:14]]
+        SpacyUtils().initialize_person_entities(self.doc, self.spans)
+
+    def test_first_match(self):
+        handler = MatcherHandler()
+        pattern, trigger = RELATION_TOKEN_PATTERNS['relatives']
+        handler.add_rule("rel", 'relatives', pattern, trigger)
+        pattern, trigger = RELATION_TOKEN_PATTERNS['marry']
+        handler.add_rule("rel", 'marry', pattern, trigger)
+        output = handler.execute(self.doc[:])
+        # Hyphenated relatives are matched by their last word
+        self.assertEqual(['granddaughter', 'married'], output['rel'])
+
+    def test_negative(self):
+        handler = MatcherHandler()
+        pattern, trigger = RELATION_TOKEN_PATTERNS['born_to']
+        handler.add_rule("rel", 'born_to', pattern, trigger)
+        self.assertEqual({}, handler.execute(self.doc[:]))
+
+    def test_normalizer_receives_token(self):
+        handler = MatcherHandler()
+        pattern, trigger = RELATION_TOKEN_PATTERNS['marry']
+        handler.add_rule("rel", 'marry', pattern, trigger, normalizer=RelationshipNormalizer())
+        output = handler.execute(self.doc[8:])
+        self.assertEqual("[39:49],spouse_of,[59:72]", str(output['rel'][0]))
+        self.assertEqual('marry', output['rel'][0].source)
+
+    def test_first_keyword_is_trigger(self):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        doc = nlp("Augustine learned that his wife had died, leaving his daughter Sarah with his family.")
+        SpacyUtils().initialize_person_entities(doc, [doc[0:1], doc[11:12]])
+        handler = MatcherHandler()
+        pattern, trigger = RELATION_TOKEN_PATTERNS['relatives']
+        handler.add_rule("rel", 'relatives', pattern, trigger, normalizer=RelationshipNormalizer())
+        regex_handler = RegexHandler()
+        regex_handler.add_rule("rel", REGEX_PERSON_RELATIVES, 1, normalizer=RelationshipNormalizer(),
+                               maskerizer=PersonMaskerizer(), name='relatives')
+        # Both "wife" and "daughter" are between the persons: the first one is the keyword, as in the regex
+        relation = handler.execute(doc[:])['rel'][0]
+        self.assertEqual(Predicate.SPOUSE_OF, relation.predicate)
+        self.assertEqual(str(regex_handler.execute(doc[:])['rel'][0]), str(relation))
+
+    def test_unknown_matcher_rules(self):
+        settings = ConfigHandler().get_snapshot()
+        RelationExtraction(dataclasses.replace(settings, relation_matcher_rules=('marry', 'born_to')))
+        with self.assertRaises(ValueError):
+            RelationExtraction(dataclasses.replace(settings, relation_matcher_rules=('marry', 'married')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,20 @@
+import dataclasses
+import os
+import tempfile
 import unittest
 import spacy
-from name_handler import NameHandler
+from name_handler import NameHandler, FirstNameDataset, FirstNameIndex, FuzzyNameIndex, TitleLexicon, \
+    FUZZY_MIN_NAME_LENGTH
 from constants import *
 
+config = ConfigHandler()
+
+FIRST_NAMES_CSV = """Name,Total_Count,Overall_Frequency,Female_Count,Male_Count,Female_Frequency,Male_Frequency
+James,5213689,1.0000000000,23528,5190161,0.004512736,0.995487264
+Mary,4138360,0.7937368830,4125675,12685,0.996934776,0.003065224
+Zyon,1500,0.0002877000,50,1450,0.033333333,0.966666667
+"""
+
 
 class NameHandlerTest(unittest.TestCase):
 
@@ -119,3 +131,150 @@ class NameHandlerTest(unittest.TestCase):
         return attrs
 
 
+class FirstNameIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.dataset = os.path.join(directory, "names.csv")
+        self.location = os.path.join(directory, "names.npy")
+        with open(self.dataset, 'w') as f:
+            f.write(FIRST_NAMES_CSV)
+
+    def test_same_entries_as_dataset(self):
+        index = FirstNameIndex(location=self.location, dataset=self.dataset)
+        names = FirstNameDataset.get_names(self.dataset)
+        self.assertEqual(len(names), len(index))
+        for name, entry in names.items():
+            self.assertIn(name, index)
+            self.assertEqual(vars(entry), vars(index[name]))
+        self.assertNotIn("john", index)
+        self.assertIsNone(index.get("john"))
+        self.assertEqual('F', index["mary"].get_gender())
+        self.assertEqual(['james', 'mary', 'zyon'], [name for name, _ in index.items()])
+
+    def test_index_is_rebuilt_when_dataset_changes(self):
+        FirstNameIndex(location=self.location, dataset=self.dataset)
+        with open(self.dataset, 'a') as f:
+            f.write("John,5163958,0.9904614470,21715,5142243,0.004205108,0.995794892\n")
+        os.utime(self.location, (0, 0))
+        index = FirstNameIndex(location=self.location, dataset=self.dataset)
+        self.assertEqual('M', index["john"].get_gender())
+
+    def test_index_without_dataset(self):
+        FirstNameIndex(location=self.location, dataset=self.dataset)
+        os.remove(self.dataset)
+        index = FirstNameIndex(location=self.location, dataset=self.dataset)
+        self.assertEqual('F', index["mary"].get_gender())
+        self.assertEqual(["names.npy"], os.listdir(os.path.dirname(self.location)))  # no temporary file left
+
+
+class FuzzyNameIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.frequencies = {'jonathan': 0.2, 'jonathon': 0.05, 'elizabeth': 0.6, 'michael': 0.9, 'michel': 0.01}
+
+    def test_closest_name(self):
+        index = FuzzyNameIndex(self.frequencies, max_distance=1)
+        self.assertEqual('jonathon', index.find('johnathon'))
+        self.assertEqual('elizabeth', index.find('elisabeth'))
+        self.assertEqual('michael', index.find('micheal'))  # Transposition
+        self.assertEqual('michael', index.find('michael'))
+        self.assertIsNone(index.find('washington'))
+
+    def test_ties_prefer_the_most_frequent_name(self):
+        index = FuzzyNameIndex(self.frequencies, max_distance=2)
+        self.assertEqual('jonathan', index.find('johnathen'))
+        self.assertEqual('michael', index.find('micheel'))
+
+
+class NameHandlerFuzzyLookupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dataclasses.replace(config.get_snapshot(), fuzzy_name_lookup=True, fuzzy_name_max_distance=1)
+
+    def test_misspelled_name(self):
+        lookup = NameHandler(self.settings).lookup("Margarret")
+        self.assertEqual(('margarret', 'margaret'), (lookup.normalized, lookup.matched_name))
+        self.assertEqual((True, 'F'), (lookup.is_first_name, lookup.gender))
+
+    def test_disabled(self):
+        settings = dataclasses.replace(self.settings, fuzzy_name_lookup=False)
+        lookup = NameHandler(settings).lookup("Margarret")
+        self.assertEqual((None, False, None), (lookup.matched_name, lookup.is_first_name, lookup.gender))
+
+    def test_short_names_are_not_approximated(self):
+        handler = NameHandler(self.settings)
+        self.assertLess(len("Mxry"), FUZZY_MIN_NAME_LENGTH)
+        self.assertEqual('mary', handler.get_fuzzy_index().find("mxry"))
+        self.assertIsNone(handler.lookup("Mxry").matched_name)
+
+
+class TitleLexiconTest(unittest.TestCase):
+
+    def setUp(self):
+        settings = dataclasses.replace(config.get_snapshot(), army_titles=("general", "lieutenant", "lieutenant colonel"))
+        self.lexicon = TitleLexicon(settings)
+        self.nlp = spacy.blank("en")
+
+    def test_all_categories_in_one_search(self):
+        titles = self.lexicon.search(["Mrs.", "Abigail", "Adams", "Jr.,", "Esq"])
+        self.assertEqual({PERSON_COURTESY_TITLE: "Mrs.", PERSON_GEN_TITLE: "Jr.,", PERSON_OTHER_TITLE: "Esq"}, titles)
+
+    def test_first_part_categories(self):
+        self.assertEqual({}, self.lexicon.search(["George", "General", "Washington"]))
+        self.assertEqual({PERSON_ARMY_TITLE: "General"}, self.lexicon.search(["General", "George", "Washington"]))
+
+    def test_multiple_word_titles(self):
+        titles = self.lexicon.search(["Lieutenant", "Colonel", "John", "Smith"])
+        self.assertEqual({PERSON_ARMY_TITLE: "Lieutenant Colonel"}, titles)
+        self.assertEqual({PERSON_ARMY_TITLE: "Lieutenant"}, self.lexicon.search(["Lieutenant", "John", "Smith"]))
+
+    def test_previous_tokens(self):
+        doc = self.nlp("Lieutenant Colonel John Smith")
+        self.assertEqual({PERSON_ARMY_TITLE: "Lieutenant Colonel"}, self.lexicon.search(["John", "Smith"], doc[2:]))
+        doc = self.nlp("Queen Elizabeth II")
+        titles = self.lexicon.search(["Elizabeth", "II"], doc[1:])
+        self.assertEqual({PERSON_ROYAL_TITLE: "Queen", PERSON_GEN_TITLE: "II"}, titles)
+
+
+class NameHandlerBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.nlp = spacy.blank("en")
+        self.handler = NameHandler()
+
+    def test_same_persons_as_single_mentions(self):
+        doc = self.nlp('Barack Obama met Michelle Obama . Obama and Mrs. Obama met General John Smith , Esq . '
+                       'Michelle and "Bud" John Smith , Esq')
+        spans = [doc[0:2], doc[3:5], doc[6:7], doc[9:10], doc[12:16], doc[17:18], doc[19:24]]
+        persons = self.handler.to_persons({span: {} for span in spans})
+
+        known_names_map = {'first_names': set(), 'last_names': set(), 'nicknames': set()}
+        for span, person in zip(spans, persons):
+            expected = self.handler.to_person({span: {}}, known_names_map=known_names_map)
+            self.assertEqual(expected, person)
+            for prop, key in [(PERSON_LAST_NAME, 'last_names'), (PERSON_FIRST_NAME, 'first_names'),
+                              (PERSON_NICKNAME, 'nicknames')]:
+                if expected.get(prop):
+                    known_names_map[key].add(expected[prop].lower())
+
+        self.assertEqual('Obama', persons[2].get(PERSON_LAST_NAME))
+        self.assertEqual('Mrs', persons[3].get(PERSON_COURTESY_TITLE))
+        self.assertEqual('General', persons[4].get(PERSON_ARMY_TITLE))
+        self.assertEqual(None, persons[6].get(PERSON_ARMY_TITLE))
+        self.assertEqual('Bud', persons[6].get(PERSON_NICKNAME))
+
+    def test_parses_are_reused_across_documents(self):
+        spans = []
+        for text in ['Barack Obama met Mrs. Obama', 'Then Barack Obama met Mrs. Obama']:
+            doc = self.nlp(text)
+            spans.append({doc[-5:-3]: {}, doc[-1:]: {}})
+        first_document = self.handler.to_persons(spans[0])
+        second_document = self.handler.to_persons(spans[1])
+        for first, second in zip(first_document, second_document):
+            first.pop('span')
+            second.pop('span')
+            self.assertEqual(first, second)
+        self.assertEqual('Mrs', second_document[1].get(PERSON_COURTESY_TITLE))
+        # "Barack Obama" is parsed again, as the token before it differs
+        self.assertEqual(1, self.handler.parse_cache.get_stats()['hits'])
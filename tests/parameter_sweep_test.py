@@ -0,0 +1,62 @@
+import unittest
+
+from constants import ConfigHandler
+from parameter_sweep import ParameterSweep, STAGE_TEXTS, STAGE_DOCS, STAGE_RESOLUTIONS, STAGE_GROUPS
+from tests.test_constants import TemporaryParameters
+
+config = ConfigHandler()
+
+
+class FakeResolution(object):
+    """Stands for CrossDocumentResolution, returning the parameter values seen by each stage"""
+
+    def __init__(self):
+        self.similarity = None
+
+    def load_texts(self, documents):
+        return [(document, {'text_id': document}) for document in documents]
+
+    def process_texts(self, texts):
+        return texts
+
+    def resolve_documents(self, doc_tuples):
+        self.similarity = config.get('GROUP_SIMILARITY_THRESHOLD')
+        return {}
+
+    def link(self, resolutions):
+        return self.similarity, config.get('NAME_COMPARISON_THRESHOLD_OVERALL')
+
+
+class ParameterSweepTest(unittest.TestCase):
+
+    def setUp(self):
+        # The sweep changes the parameters, so they are written to a temporary copy of the parameters file
+        self.enterContext(TemporaryParameters())
+
+    def test_only_linkage_is_executed_again(self):
+        sweep = ParameterSweep(FakeResolution(), ["Barack_Obama", "Michelle_Obama"])
+        parameter_list = [{'NAME_COMPARISON_THRESHOLD_OVERALL': value} for value in ['0.80', '0.85', '0.90']]
+        results = [groups for _, groups in sweep.sweep(parameter_list)]
+        self.assertEqual(['0.80', '0.85', '0.90'], [entry[1] for entry in results])
+        self.assertEqual(1, sweep.executions[STAGE_TEXTS])
+        self.assertEqual(1, sweep.executions[STAGE_DOCS])
+        self.assertEqual(1, sweep.executions[STAGE_RESOLUTIONS])
+        self.assertEqual(3, sweep.executions[STAGE_GROUPS])
+
+    def test_inner_resolution_is_executed_again(self):
+        sweep = ParameterSweep(FakeResolution(), ["Barack_Obama"])
+        parameter_list = [{'GROUP_SIMILARITY_THRESHOLD': '0.50', 'NAME_COMPARISON_THRESHOLD_OVERALL': '0.80'},
+                          {'GROUP_SIMILARITY_THRESHOLD': '0.50', 'NAME_COMPARISON_THRESHOLD_OVERALL': '0.90'},
+                          {'GROUP_SIMILARITY_THRESHOLD': '0.60', 'NAME_COMPARISON_THRESHOLD_OVERALL': '0.90'}]
+        results = [groups for _, groups in sweep.sweep(parameter_list)]
+        self.assertEqual(('0.60', '0.90'), results[-1])
+        self.assertEqual(1, sweep.executions[STAGE_DOCS])
+        self.assertEqual(2, sweep.executions[STAGE_RESOLUTIONS])
+        self.assertEqual(3, sweep.executions[STAGE_GROUPS])
+
+    def test_relation_matcher_rules_invalidate_inner_resolution(self):
+        sweep = ParameterSweep(FakeResolution(), ["Barack_Obama"])
+        parameter_list = [{'RELATION_MATCHER_RULES': "[]"}, {'RELATION_MATCHER_RULES': "['marry']"}]
+        list(sweep.sweep(parameter_list))
+        self.assertEqual(1, sweep.executions[STAGE_DOCS])
+        self.assertEqual(2, sweep.executions[STAGE_RESOLUTIONS])
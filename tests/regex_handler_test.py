@@ -2,6 +2,16 @@ import unittest
 from regex_handler import RegexHandler
 
 
+class CountingMaskerizer(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def apply_mask(self, span):
+        self.calls += 1
+        return span.replace("Barack", "_PERSON_")
+
+
 class RegexHandlerTest(unittest.TestCase):
 
     def test_regex_positive(self):
@@ -19,6 +29,18 @@ class RegexHandlerTest(unittest.TestCase):
         output = handler.execute("This should NOT match")  # NOT
         self.assertTrue(len(output) == 0)
 
+    def test_mask_is_applied_once(self):
+        maskerizer = CountingMaskerizer()
+        handler = RegexHandler()
+        handler.add_rule("yob", r"\((\d{4})–(\d{4})\)", 1, maskerizer=maskerizer)
+        handler.add_rule("yod", r"\((\d{4})–(\d{4})\)", 2, maskerizer=maskerizer)
+        handler.add_rule("rel", "(_PERSON_) married", 1, maskerizer=maskerizer)
+        output = handler.execute("(1942–1995) Barack married")
+        self.assertEqual(['1942'], output['yob'])
+        self.assertEqual(['1995'], output['yod'])
+        self.assertEqual(['_PERSON_'], output['rel'])
+        self.assertEqual(1, maskerizer.calls)
+
     def test_regex_normalizer(self):
         print("To be done")
         self.assertTrue(True)
@@ -3,6 +3,7 @@ import unittest
 import spacy
 
 from named_entity_recognition import PersonRecognition
+from regex_handler import RegexHandler
 from relation_extraction import *
 from relation_extraction import RelationExtraction
 from spacy_utils import SpacyUtils
@@ -97,36 +98,36 @@ class AttrResolversTest(unittest.TestCase):
         resolver = AttrResolverGroup(min_ents=2, max_tokens=1000, mode="start_sent")
         resolver.add_expr(id="rel", expr=REGEX_PERSON_MARRY, group=1, mask=self.mask, normalizer=self.norm_rel)
         result = self.execute(resolver, TEXT_1, 3)
-        self.assertEqual(result['rel'][0], "[243:246],spouse_of,[302:314]")
+        self.assertEqual(str(result['rel'][0]), "[243:246],spouse_of,[302:314]")
 
     def test_person_relatives(self):
         resolver = AttrResolverGroup(min_ents=2, max_tokens=1000, mode="start_span")
         resolver.add_expr(id="rel", expr=REGEX_PERSON_RELATIVES, group=1, mask=self.mask, normalizer=self.norm_rel)
         result = self.execute(resolver, TEXT_4, 2)
-        self.assertEqual(result['rel'][0], "[76:79],spouse_of,[85:98]")
+        self.assertEqual(str(result['rel'][0]), "[76:79],spouse_of,[85:98]")
 
     def test_person_relatives_again(self):
         resolver = AttrResolverGroup(min_ents=2, max_tokens=1000, mode="start_span")
         resolver.add_expr(id="rel", expr=REGEX_PERSON_RELATIVES, group=1, mask=self.mask, normalizer=self.norm_rel)
         result = self.execute(resolver, TEXT_5, 4)
-        self.assertEqual(result['rel'][0], "[182:184],sibling_of,[212:225]")
+        self.assertEqual(str(result['rel'][0]), "[182:184],sibling_of,[212:225]")
 
     def test_relationship_parent_resolver(self):
         res = AttrResolverGroup(min_ents=2, max_tokens=1000, mode="start_sent")
         res.add_expr(id="rel", expr=REGEX_PERSON_BORN_TO, group=1, mask=self.mask, normalizer=self.norm_born_first)
         result = self.execute(res, TEXT_2, 0)
-        self.assertEqual(result['rel'][0], "[0:22],child_of,[81:96]")
+        self.assertEqual(str(result['rel'][0]), "[0:22],child_of,[81:96]")
 
         res = AttrResolverGroup(min_ents=3, max_tokens=1000, mode="start_sent")
         res.add_expr(id="rel", expr=REGEX_PERSON_BORN_TO_PAIR, group=1, mask=self.mask, normalizer=self.norm_born_first)
         res.add_expr(id="rel", expr=REGEX_PERSON_BORN_TO_PAIR, group=1, mask=self.mask, normalizer=self.norm_born_second)
         result = self.execute(res, TEXT_2, 0)
-        self.assertEqual(result['rel'][0], "[0:22],child_of,[81:96]")
-        self.assertEqual(result['rel'][1], "[0:22],child_of,[163:178]")
+        self.assertEqual(str(result['rel'][0]), "[0:22],child_of,[81:96]")
+        self.assertEqual(str(result['rel'][1]), "[0:22],child_of,[163:178]")
 
         result = self.execute(res, TEXT_6, 0)
-        self.assertEqual(result['rel'][0], "[0:2],child_of,[33:45]")
-        self.assertEqual(result['rel'][1], "[0:2],child_of,[50:85]")
+        self.assertEqual(str(result['rel'][0]), "[0:2],child_of,[33:45]")
+        self.assertEqual(str(result['rel'][1]), "[0:2],child_of,[50:85]")
 
     def test_last_name_before_wedding(self):
         resolver = AttrResolverGroup(min_ents=1, max_tokens=4, mode="after_span")
@@ -141,8 +142,8 @@ class AttrResolversTest(unittest.TestCase):
         rel_pair_res.add_expr(id="rel", expr=REGEX_PERSON_CHILDREN_PAIR, group=1, mask=self.mask, normalizer=self.norm_rel)
         rel_pair_res.add_expr(id="rel", expr=REGEX_PERSON_CHILDREN_PAIR, group=1, mask=self.mask, normalizer=rel_norm_2nd)
         result = self.execute(rel_pair_res, text, 0)
-        self.assertEqual(result['rel'][0], "[0:9],child_of,[25:39]")
-        self.assertEqual(result['rel'][1], "[0:9],child_of,[44:55]")
+        self.assertEqual(str(result['rel'][0]), "[0:9],child_of,[25:39]")
+        self.assertEqual(str(result['rel'][1]), "[0:9],child_of,[44:55]")
 
     def test_afterwards_nickname(self):
         resolver = AttrResolverGroup(min_ents=1, max_tokens=4, mode="after_span")
@@ -167,17 +168,100 @@ class AttrResolversTest(unittest.TestCase):
         resolver = AttrResolverGroup(min_ents=2, max_tokens=1000, mode="start_span")
         resolver.add_expr(id="rel", expr=REGEX_PERSON_MARRY, group=1, mask=self.mask, normalizer=self.norm_rel)
         result = self.execute(resolver, text, 0)
-        self.assertEqual(result['rel'][0], "[0:7],spouse_of,[23:40]")
+        self.assertEqual(str(result['rel'][0]), "[0:7],spouse_of,[23:40]")
 
     def test_married_sentence_again(self):
         text = "Fannie Josephine (1857–1909), married Ulysses S. Grant, Jr."
         resolver = AttrResolverGroup(min_ents=2, max_tokens=1000, mode="start_span")
         resolver.add_expr(id="rel", expr=REGEX_PERSON_MARRY, group=1, mask=self.mask, normalizer=self.norm_rel)
         result = self.execute(resolver, text, 0)
-        self.assertEqual(result['rel'][0], "[0:16],spouse_of,[38:59]")
+        self.assertEqual(str(result['rel'][0]), "[0:16],spouse_of,[38:59]")
 
     def __get_doc(self, text):
         doc = AttrResolversTest.nlp(text)
         person_name_spans = PersonRecognition().get_person_spans(doc)
         SpacyUtils().initialize_person_entities(doc, person_name_spans)
         return doc
+
+
+class DateExtractorTest(unittest.TestCase):
+
+    def test_same_results_as_all_rules(self):
+        extractor = DateExtractor()
+        handler = RegexHandler()
+        handler.rules = extractor.rules
+        texts = [TEXT_1, TEXT_2, TEXT_3, TEXT_5, TEXT_6, TEXT_8, TEXT_9, "(25 December 1737 – 18 April 1785)",
+                 "(May 13, 1744 – May 1786)", "(January 26, 1644-1695)", "(died in 1928)", "(born August 4)",
+                 "had no issue"]
+        for text in texts:
+            self.assertEqual(handler.execute(text), extractor.execute(text), text)
+
+    def test_date_fields(self):
+        result = DateExtractor().execute("(February 22, 1732 – December 14, 1799) was")
+        self.assertEqual({'yob': '1732', 'yod': '1799', 'mob': 2, 'dob': '22', 'mod': 12, 'dod': '14'},
+                         {field: values[0] for field, values in result.items()})
+        self.assertEqual({}, DateExtractor().execute("was an American political leader"))
+
+
+class ResolverPrefilterTest(unittest.TestCase):
+
+    def test_same_relationships_as_all_resolvers(self):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        doc = nlp('John Adams (1735–1826) married Abigail Smith. Johnson met Ann Hall at Boston. '
+                  'Mary "Polly" Hall met Tom and Ann.')
+        spans = [doc[0:2], doc[6:8], doc[9:10], doc[11:13], doc[16:17], doc[22:23], doc[24:25]]
+        SpacyUtils().initialize_person_entities(doc, spans)
+        extraction = RelationExtraction()
+        expected = {span: Utils.merge_dictionaries(list(filter(None, [resolver.execute(span)
+                                                                       for resolver in extraction.resolvers])))
+                    for span in spans}
+        self.assertEqual(expected, extraction.extract(spans))
+        self.assertEqual(['1735'], expected[spans[0]]['yob'])
+        self.assertEqual(['Polly'], expected[spans[4]]['nickname'])
+
+    def test_prefilters(self):
+        self.assertFalse(can_match_dates("he served as president.", 1))
+        self.assertTrue(can_match_dates("(b. august 4)", 1))
+        self.assertFalse(can_match_relations("he met him at boston.", 2))
+        self.assertTrue(can_match_relations("he met him at boston.", 3))
+        self.assertTrue(can_match_relations("johnson met him.", 2))
+        self.assertFalse(can_match_attributes("abigail smith adams", 1))
+        self.assertTrue(can_match_attributes("abigail (née smith) adams", 1))
+
+
+class RelationRecordTest(unittest.TestCase):
+
+    def setUp(self):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        self.doc = nlp("John Adams and Abigail Smith married in 1764.")
+        self.spans = [self.doc[0:2], self.doc[3:5]]
+        SpacyUtils().initialize_person_entities(self.doc, self.spans)
+
+    def test_married_relation(self):
+        relation = MarriedNormalizer().normalize(span=self.doc[:], result='married', rule='marry')
+        self.assertEqual(Predicate.SPOUSE_OF, relation.predicate)
+        self.assertEqual('marry', relation.source)
+        self.assertEqual({(0, 10), (15, 28)}, {relation.get_subject_offset(), relation.get_object_offset()})
+
+    def test_string(self):
+        relation = Relation.from_spans(self.spans[0], Predicate.SPOUSE_OF, self.spans[1], 'relationship')
+        self.assertEqual("[0:10],spouse_of,[15:28]", str(relation))
+        self.assertEqual((15, 28), relation.get_object_offset())
+
+    def test_regex_match_token(self):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        doc = nlp("Once married, Ann Smith married John Adams in 1790.")
+        spans = [doc[3:5], doc[6:8]]
+        SpacyUtils().initialize_person_entities(doc, spans)
+        handler = RegexHandler()
+        handler.add_rule("rel", REGEX_PERSON_MARRY, 1, normalizer=RelationshipNormalizer(),
+                         maskerizer=PersonMaskerizer(), name='marry')
+        # The keyword is the "married" found by the regex, not the first one of the sentence
+        relation = handler.execute(doc[:])['rel'][0]
+        self.assertEqual("[14:23],spouse_of,[32:42]", str(relation))
+        self.assertEqual('marry', relation.source)
+        self.assertEqual(doc[5], SpacyUtils().get_token_at(doc, 24))
+        self.assertEqual(doc[4], SpacyUtils().get_token_at(doc, 23))
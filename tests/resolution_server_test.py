@@ -0,0 +1,57 @@
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+import spacy
+
+from resolution_server import ResolutionService, create_server
+
+
+class ResolutionServerTest(unittest.TestCase):
+
+    def setUp(self):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        nlp.add_pipe("entity_ruler").add_patterns([
+            {"label": "PERSON", "pattern": "Michelle Obama"},
+            {"label": "PERSON", "pattern": "Barack Obama"},
+            {"label": "DATE", "pattern": "January 17, 1964"}
+        ])
+        self.server = create_server(ResolutionService(nlp), port=0)
+        self.url = "http://127.0.0.1:{0}".format(self.server.server_address[1])
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __post(self, data):
+        request = urllib.request.Request(self.url + "/resolve", data=json.dumps(data).encode("utf8"), method="POST")
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read().decode("utf8"))
+
+    def test_health(self):
+        with urllib.request.urlopen(self.url + "/health") as response:
+            self.assertEqual({'status': 'ok'}, json.loads(response.read().decode("utf8")))
+
+    def test_resolve_texts(self):
+        response = self.__post({'texts': {'Chicago': "Chicago is a city in Illinois."}})
+        self.assertEqual({'groups': []}, response)
+
+    def test_resolve_persons(self):
+        text = "Michelle Obama (born January 17, 1964) married Barack Obama in 1992. She is an attorney."
+        response = self.__post({'texts': {'Michelle_Obama': text}})
+        groups = {group['merged_name'].split(" (")[0]: group for group in response['groups']}
+        self.assertEqual({'Michelle Obama', 'Barack Obama'}, set(groups))
+        michelle, barack = groups['Michelle Obama'], groups['Barack Obama']
+        self.assertEqual(('F', '1964'), (michelle['gender'], michelle['yob']))
+        self.assertEqual([barack['group_id']], michelle['spouse_of_group_id'])
+        self.assertEqual(['Michelle'], barack['spouse_of_first_name'])
+
+    def test_invalid_request(self):
+        for data in [{'unknown': []}, ["text"], {'texts': ["text"]}, {'texts': {'id': 1}}, {'documents': "Obama"}]:
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                self.__post(data)
+            self.assertEqual(400, context.exception.code)
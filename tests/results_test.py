@@ -1,9 +1,12 @@
 import unittest
 import spacy
+from cascade import GazetteerGate
 from constants import *
+from doc_cache import DocCache
 from named_entity_recognition import PersonRecognition
+from parameter_sweep import ParameterSweep
 from scrapper import Scrapper
-from spacy_helper import CrossDocumentResolution
+from spacy_helper import CrossDocumentResolution, DISABLED_COMPONENTS
 from validation import ValidationHelper
 import itertools as it
 from tests.test_constants import TEST_SET
@@ -15,7 +18,8 @@ config = ConfigHandler()
 class ResultsTest(unittest.TestCase):
 
     def setUp(self):
-        self.nlp = spacy.load("en_core_web_trf", disable=["lemmatizer", "textcat"])
+        self.nlp = spacy.load("en_core_web_trf", disable=DISABLED_COMPONENTS)
+        self.doc_cache = DocCache(self.nlp, disabled=DISABLED_COMPONENTS)
         self.dataset = TEST_SET
 
     def test_entity_resolution_and_relationship_extraction_score(self):
@@ -34,15 +38,13 @@ class ResultsTest(unittest.TestCase):
         best_recall = 0
         best_precision = 0
 
-        for parameters in parameter_list:
-            config.set_values(parameters)
-
-            validation = ValidationHelper(self.dataset)
-            exclusion_map = validation.get_exclusion_map()
-
-            cdr = CrossDocumentResolution(self.nlp, exclusion_map=exclusion_map)
-            groups = cdr.resolve(self.dataset)
+        validation = ValidationHelper(self.dataset)
+        exclusion_map = validation.get_exclusion_map()
+        cdr = CrossDocumentResolution(self.nlp, exclusion_map=exclusion_map, doc_cache=self.doc_cache)
+        # Only the stages affected by the changed parameters are executed again for each combination
+        parameter_sweep = ParameterSweep(cdr, self.dataset)
 
+        for parameters, groups in parameter_sweep.sweep(parameter_list):
             validation.get_personal_data_score(groups)
 
             scores = validation.get_scores(groups)['all']
@@ -63,6 +65,7 @@ class ResultsTest(unittest.TestCase):
         print("Best Avg. F-score: ", best_avg, best_avg_params)
         print("Best Precision Score: ", best_precision, best_precision_params)
         print("Best Recall Score: ", best_recall, best_recall_params)
+        print("Stage executions: ", parameter_sweep.executions)
 
     def test_named_entity_recognition_score(self):
         scrapper = Scrapper()
@@ -111,6 +114,30 @@ class ResultsTest(unittest.TestCase):
         print({k: v for k, v in
                sorted(metrics.items(), key=lambda item: item[1]['overall_performance_impact'], reverse=True)})
 
+    def test_cascade_recall_impact(self):
+        # Annotated references found in the chunks skipped by the gate cannot be recognised in cascade mode
+        scrapper = Scrapper()
+        gate = GazetteerGate()
+        validation = ValidationHelper(self.dataset)
+        references = [reference for references in validation.validation_map.values() for reference in references]
+        skipped_chunks = 0
+        total_chunks = 0
+        missed_references = 0
+        for entry in self.dataset:
+            chunks = Scrapper.merge_paragraphs(scrapper.get_wiki_paragraphs(entry), int(config.get('CHUNK_MAX_CHARS')))
+            offset = 0
+            skipped_ranges = []
+            for chunk, candidate in zip(chunks, gate.screen(chunks)):
+                if not candidate:
+                    skipped_ranges.append((offset, offset + len(chunk)))
+                offset += len(chunk)
+            total_chunks += len(chunks)
+            skipped_chunks += len(skipped_ranges)
+            missed_references += len([reference for reference in references if reference.source_document == entry
+                                      and any(start <= reference.char_start < end for start, end in skipped_ranges)])
+        print("Skipped chunks: ", skipped_chunks, "of", total_chunks)
+        print("Recall impact: ", missed_references / len(references), "(", missed_references, "references)")
+
     # Returns the combination of the parameters provided
     def __get_grid_product(self, param_grid):
         return (dict(zip(param_grid.keys(), values)) for values in it.product(*param_grid.values()))
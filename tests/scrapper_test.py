@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from scrapper import ArticleLoader, Scrapper, WikiContentExtractor, WIKI_TEXT_SELECTOR, WIKI_EXCLUSION_SELECTORS
+
+ARTICLE_HTML = """<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>Michelle Obama</title></head>
+<body>
+<div id="content"><p>Paragraph outside of the article content.</p>
+<div id="mw-content-text"><div class="mw-parser-output">
+<p>
+</p>
+<p><b>Michelle LaVaughn Robinson Obama</b> (<a href="/wiki/Help:IPA" title="IPA">n&#233;e</a>
+<a href="/wiki/Robinson">Robinson</a>; born January&#160;17, 1964)<sup class="reference"><a href="#cite_note-1">[1]</a></sup>
+is an American attorney.<!-- comment -->
+</p>
+<p>She married <a href="/wiki/Barack_Obama" title="Barack Obama">Barack Obama</a> in 1992.
+<a href="/w/index.php?title=Edit">Edit</a> <span class="rt-commentedText">ignored</span>
+<a href="/wiki/Pronunciation_respelling_key">ROB</a> Barack Obama and <a href="/wiki/Barack_Obama">Barack Obama</a>.</p>
+</div></div></div></body></html>
+"""
+
+
+class ScrapperTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scrapper = Scrapper()
+        self.location = tempfile.mkdtemp()
+        self.path = os.path.join(self.location, "Michelle_Obama.html")
+        with open(self.path, 'w', encoding="utf8") as f:
+            f.write(ARTICLE_HTML)
+
+    def test_single_parse_text(self):
+        text = self.scrapper.get_text(self.path, WIKI_TEXT_SELECTOR, exclude_selectors=WIKI_EXCLUSION_SELECTORS)
+        expected = Scrapper.normalize_text(text)
+        for use_lxml in [True, False]:
+            text, _ = WikiContentExtractor(use_lxml=use_lxml).extract(self.path)
+            self.assertEqual(expected, text)
+
+    def test_single_parse_anchors(self):
+        for use_lxml in [True, False]:
+            text, anchors = WikiContentExtractor(use_lxml=use_lxml).extract(self.path)
+            self.assertEqual(['née', 'Robinson', 'Barack Obama', 'Barack Obama'], [a['text'] for a in anchors])
+            for anchor in anchors:
+                self.assertEqual(anchor['text'], text[anchor['start']:anchor['end']])
+            # The second anchor comes after the same (non anchor) text
+            self.assertTrue(text[:anchors[3]['start']].endswith("Barack Obama and "))
+
+    def test_paragraphs(self):
+        for use_lxml in [True, False]:
+            extractor = WikiContentExtractor(use_lxml=use_lxml)
+            text, _ = extractor.extract(self.path)
+            paragraphs = extractor.extract_paragraphs(self.path)
+            self.assertEqual(text, ''.join(paragraphs))
+            self.assertEqual(2, len(paragraphs))
+            self.assertTrue(paragraphs[1].startswith("She married"))
+            self.assertEqual([text], Scrapper.merge_paragraphs(paragraphs, len(text)))
+            self.assertEqual(paragraphs, Scrapper.merge_paragraphs(paragraphs, len(text) - 1))
+
+    def test_article_loader_order(self):
+        documents = ["Michelle_Obama_{}".format(i) for i in range(5)]
+        for i, document_name in enumerate(documents):
+            with open(os.path.join(self.location, document_name + ".html"), 'w', encoding="utf8") as f:
+                f.write(ARTICLE_HTML.replace("in 1992", "in {}".format(1990 + i)))
+        with mock.patch('scrapper.WIKIPEDIA_DATA_LOCATION', self.location):
+            expected = list(ArticleLoader(workers=0).load(documents))
+            loaded = list(ArticleLoader(workers=3, prefetch=2).load(documents))
+        self.assertEqual(expected, loaded)
+        self.assertEqual(documents, [context['text_id'] for _, context in loaded])
+        self.assertIn("in 1994", loaded[4][0])
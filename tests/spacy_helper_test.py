@@ -0,0 +1,56 @@
+import unittest
+
+import spacy
+
+from cascade import GazetteerGate
+from constants import ConfigHandler
+from name_handler import FirstNameEntry
+from spacy_helper import CrossDocumentResolution
+from tests.test_constants import TemporaryParameters
+
+PARAGRAPHS = ["Michelle LaVaughn Robinson Obama (née Robinson; born January 17, 1964) is an American attorney. ",
+              "She married Barack Obama in 1992. ",
+              "Their daughters are Malia and Sasha."]
+
+
+class CrossDocumentResolutionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.nlp = spacy.blank("en")
+        self.nlp.add_pipe("sentencizer")
+
+    def test_chunks_keep_article_offsets(self):
+        text = ''.join(PARAGRAPHS)
+        texts = [(text, {'text_id': "Michelle_Obama", 'chunks': PARAGRAPHS}),
+                 ("Barack Obama", {'text_id': "Barack_Obama"})]
+        whole = list(CrossDocumentResolution(self.nlp).process_texts(texts))
+        chunked = list(CrossDocumentResolution(self.nlp, chunked=True).process_texts(texts))
+        self.assertEqual(["Michelle_Obama", "Barack_Obama"], [context['text_id'] for _, context in chunked])
+        for (whole_doc, _), (chunked_doc, _) in zip(whole, chunked):
+            self.assertEqual(whole_doc.text, chunked_doc.text)
+            self.assertEqual([(t.idx, t.text) for t in whole_doc], [(t.idx, t.text) for t in chunked_doc])
+        sentences = [sent.start_char for sent in chunked[0][0].sents]
+        self.assertEqual([0, len(PARAGRAPHS[0]), len(PARAGRAPHS[0]) + len(PARAGRAPHS[1])], sentences)
+
+    def test_cascade_skips_chunks_without_persons(self):
+        gate = GazetteerGate(names={'michelle': FirstNameEntry(100, 0.01, 100, 0, 1, 0)})
+        chunks = PARAGRAPHS + ["Chicago is a city in Illinois."]
+        texts = [(''.join(chunks), {'text_id': "Michelle_Obama", 'chunks': chunks})]
+        resolution = CrossDocumentResolution(self.nlp, gate=gate)
+        doc, _ = next(iter(resolution.process_texts(texts)))
+        self.assertEqual(''.join(chunks), doc.text)
+        self.assertEqual({'candidates': 2, 'skipped': 2}, resolution.cascade_stats)
+        self.assertEqual(["Michelle", "She", "Their", "Chicago"], [sent[0].text for sent in doc.sents])
+        # The counts are the ones of the last run
+        list(resolution.process_texts(texts))
+        self.assertEqual({'candidates': 2, 'skipped': 2}, resolution.cascade_stats)
+
+    def test_relation_matcher_rules_follow_configuration(self):
+        resolution = CrossDocumentResolution(self.nlp)
+        with TemporaryParameters():
+            ConfigHandler().set_values({'RELATION_MATCHER_RULES': "[]"})
+            extraction = resolution.get_relation_extraction(resolution.get_settings())
+            self.assertEqual(set(), extraction.matcher_rules)
+            self.assertIs(extraction, resolution.get_relation_extraction(resolution.get_settings()))
+            ConfigHandler().set_values({'RELATION_MATCHER_RULES': "['marry']"})
+            self.assertEqual({'marry'}, resolution.get_relation_extraction(resolution.get_settings()).matcher_rules)
@@ -1,6 +1,8 @@
+import itertools
 import unittest
 from spacy_utils import SpacyUtils
 import spacy
+from spacy.tokens import Span
 
 SPACY_POS_TAG_PROP = "tag_"
 SPACY_POS_PROPER_NOUN = "NNP"
@@ -62,3 +64,56 @@ class SpacyUtilsTest(unittest.TestCase):
 
 
 
+
+
+class PersonMentionIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        self.doc = nlp("John Adams married Abigail Smith. Their son John Quincy Adams was born in 1767. He married Louisa.")
+        self.spans = [self.doc[0:2], self.doc[3:5], self.doc[8:11], self.doc[16:17], self.doc[18:19]]
+        SpacyUtils().initialize_person_entities(self.doc, self.spans)
+
+    def test_same_window_as_sentence_tokens(self):
+        index = SpacyUtils().get_person_index(self.doc)
+        for span in self.spans:
+            sentence, persons, position = index.get_window(span)
+            expected = sorted(set(filter(None, [token._.get_person for token in span.sent])), key=lambda k: k.start)
+            self.assertEqual(span.sent, sentence)
+            self.assertEqual(expected, persons)
+            self.assertEqual(expected.index(span), position)
+
+    def test_sentence_persons(self):
+        index = SpacyUtils().get_person_index(self.doc)
+        self.assertEqual([self.spans[0], self.spans[1]], index.get_window(self.spans[1])[1])
+        self.assertEqual(1, index.get_window(self.spans[1])[2])
+        self.assertEqual([self.spans[2]], index.get_window(self.spans[2])[1])
+
+
+class IndexedFindElementsTest(unittest.TestCase):
+
+    def setUp(self):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        self.doc = nlp("John Adams married Abigail Smith and John Quincy Adams married Louisa, the daughter of Joshua.")
+        self.doc.ents = [Span(self.doc, 3, 5, label="PERSON"), Span(self.doc, 6, 9, label="PERSON")]
+        self.spans = [self.doc[0:2], self.doc[3:5], self.doc[6:9], self.doc[10:11], self.doc[16:17]]
+        self.utils = SpacyUtils()
+        self.utils.initialize_person_entities(self.doc, self.spans)
+
+    def test_same_tokens_as_loop(self):
+        index = self.doc._.person_index
+        searches = [('text', 'married', False), ('text', 'John', False), ('is_person_part', True, True),
+                    ('is_person_part', False, True)]
+        for span in [self.doc[:], self.doc[2:12]]:
+            for mode, start_at, max_tokens, (attr_key, attr_val, ext), exclude_ent_types in itertools.product(
+                    ["forward", "backward", "both"], range(span.start, span.end), [0, 2, 5, 20], searches,
+                    [[], ['PERSON']]):
+                args = (span, start_at, mode, attr_key, attr_val, max_tokens, ext, exclude_ent_types)
+                found = self.utils.find_elements(*args)
+                # Without the person index, find_elements takes the original loops
+                self.doc._.person_index = None
+                expected = self.utils.find_elements(*args)
+                self.doc._.person_index = index
+                self.assertEqual([token.i for token in expected], [token.i for token in found], args)
@@ -1,3 +1,11 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import constants
+from constants import ConfigHandler
+
 TRAINING_SET = ["William_Madison", "Algernon_Edward_Sartoris", "James_Southall_Wilson", "William_Alfred_Packard",
                 "Hancock_Lee", "Joseph_Stanley_Brown", "Asa_Waters", "Calvin_Galusha_Coolidge", "Thomas_Gardner_Ford",
                 "Robert_T._Gannett", "Thomas_Boylston", "Bartholomew_Dandridge",
@@ -97,4 +105,31 @@ TEST_SET = ["Dabney_S._Carr", "Maxwell_Karger", "Lyncoya_Jackson", "William_McKi
             "Roger_Clinton_Jr.", "Hugh_D._Auchincloss", "Ellen_Axson_Wilson", "James_Buchanan",
             "Chester_A._Arthur", "James_Monroe", "Joe_Biden", "William_McKinley", "Woodrow_Wilson",
             "Bill_Clinton", "Andrew_Johnson", "Thomas_Jefferson", "Ronald_Reagan", "Andrew_Jackson",
-            "Donald_Trump", "John_F._Kennedy"]
\ No newline at end of file
+            "Donald_Trump", "John_F._Kennedy"]
+
+
+class TemporaryParameters(object):
+    """
+    Context manager pointing ConfigHandler at a temporary copy of the parameters file, so tests can change the
+    parameters (eg. with set_values) without writing to the checked-in file.
+    """
+
+    def __enter__(self):
+        self.directory = tempfile.mkdtemp()
+        location = os.path.join(self.directory, "parameters.ini")
+        shutil.copyfile(constants.PARAMETER_FILE_NAME, location)
+        self.patcher = mock.patch('constants.PARAMETER_FILE_NAME', location)
+        self.patcher.start()
+        self.__reset_config()
+        return location
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.patcher.stop()
+        self.__reset_config()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @staticmethod
+    def __reset_config():
+        # The parsed configuration is shared by all the handlers, so it is read again from the current file
+        ConfigHandler.config = None
+        ConfigHandler().clear_cache()
@@ -1,5 +1,5 @@
 import unittest
-from utils import Utils
+from utils import Utils, LRUCache, LazyInstance, is_initialized
 
 
 class UtilsTest(unittest.TestCase):
@@ -40,5 +40,20 @@ class UtilsTest(unittest.TestCase):
         data = ['apple', 'Banana', 'Apple', 'Strawberry', 'Banana']
         self.assertEqual('banana', utils.most_frequent(data, case_sensitive=False))
 
-
-
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        self.assertEqual("JOHN", cache.get("john", lambda: "JOHN"))
+        self.assertEqual("MARY", cache.get("mary", lambda: "MARY"))
+        self.assertEqual("JOHN", cache.get("john", lambda: "other"))
+        cache.get("rose", lambda: "ROSE")  # Discards mary, the least recently used
+        self.assertEqual("other", cache.get("mary", lambda: "other"))
+        stats = cache.get_stats()
+        self.assertEqual((1, 4, 2), (stats['hits'], stats['misses'], stats['size']))
+
+    def test_lazy_instance(self):
+        # The get method of the instance (eg. NameHandler.get) is not hidden by the proxy
+        shared = LazyInstance(LRUCache, 2)
+        self.assertFalse(is_initialized(shared))
+        self.assertEqual("JOHN", shared.get("john", lambda: "JOHN"))
+        self.assertTrue(is_initialized(shared))
+        self.assertEqual(1, shared.get_stats()['misses'])
@@ -1,3 +1,4 @@
+import collections
 import logging
 import unicodedata
 import unidecode
@@ -93,3 +94,73 @@ class Utils(object):
     @staticmethod
     def replace_str(text, regex, replacement):
         return re.sub(regex, replacement, text)
+
+
+class LazyInstance(object):
+    """
+    Shared instance created on first use, for module level objects that are expensive to create
+    (eg. NameHandler loads the whole first names dataset). Attributes are forwarded to the instance, so the
+    methods of the proxy itself are private (eg. NameHandler.get must not be hidden).
+    """
+
+    def __init__(self, factory, *args, **kwargs):
+        self.__factory = factory
+        self.__args = args
+        self.__kwargs = kwargs
+        self.__instance = None
+
+    def _get_instance(self):
+        if self.__instance is None:
+            logger.debug("Creating shared instance of %s", self.__factory)
+            self.__instance = self.__factory(*self.__args, **self.__kwargs)
+        return self.__instance
+
+    def _is_initialized(self):
+        return self.__instance is not None
+
+    def __getattr__(self, name):
+        # Private and special attributes are not forwarded (eg. while the object is being unpickled)
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._get_instance(), name)
+
+
+def is_initialized(lazy_instance):
+    return lazy_instance._is_initialized()
+
+
+class LRUCache(object):
+    """
+    Bounded cache discarding the least recently used entries.
+    The hits and misses are counted, so the cache can be sized based on the workload.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        """Returns the cached value for the key, calling compute() to create it when missing"""
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        value = compute()
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+
+    def get_stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'maxsize': self.maxsize,
+                'hit_ratio': self.hits / total if total else 0.0}
+
+    def __len__(self):
+        return len(self.entries)
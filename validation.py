@@ -357,7 +357,7 @@ class ValidationHelper(object):
                     continue
                 if mode == 'persons' and person.pronoun:
                     continue
-                text = "{0}_[{1}:{2}]_({3})".format(person.span, person.char_start, person.char_end, person.document_id)
+                text = "{0}_[{1}:{2}]_({3})".format(person.text, person.char_start, person.char_end, person.document_id)
                 entry.add(text)
             if entry:
                 resolution_entries.append(entry)